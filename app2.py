@@ -1,9 +1,35 @@
+import os
+import time
+
 import pandas as pd
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
 
+from cube import MasterCube
+from pipeline.master import merge_company, compact_master_frames
+from pipeline.snapshot import load_master_snapshot, source_key
+from trends import TrendSet, ratio_direction
+from scenarios import scenario_grid, run_scenarios, company_scenarios, base_items
+from charts import (
+    company_color_map, profitability_chart, liquidity_chart, leverage_chart, efficiency_gauges,
+    asset_structure_chart, financing_structure_chart, cash_flow_waterfall, trend_chart,
+    sensitivity_heatmap, breach_probability_chart, section_timing_chart, cluster_map, correlation_heatmap
+)
+from clustering import RatioProfile, cluster_companies
+from stress import stress_test, stress_key, load_cached, standard_error, ANY_BREACH
+from instrumentation import timings
+from uploads import UploadManager
+
+rerun_start = time.perf_counter()
+rerun_cpu_start = time.thread_time()
+
+@st.cache_resource
+def load_css():
+    """Dashboard stylesheet"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "dashboard.css")) as f:
+        return f.read()
+
+
 # Page configuration
 st.set_page_config(
     page_title="Financial Ratios Dashboard",
@@ -13,307 +39,217 @@ st.set_page_config(
 )
 
 
-# Add CSS with theme-aware variables
-st.markdown("""
-<style>
-    /* ============================================
-       CORE APP STYLING (uses CSS variables)
-       ============================================ */
-    
-    /* Apply theme variables to main app */
-    .stApp {
-        background-color: var(--primary-bg) !important;
-        color: var(--text-color) !important;
-    }
-    
-    /* Force all text to use theme text color */
-    p, h1, h2, h3, h4, h5, h6, div, span, label {
-        color: var(--text-color) !important;
-    }
-    
-    /* ============================================
-       YOUR CUSTOM STYLES (updated to use CSS variables)
-       ============================================ */
-    
-    /* Main title */
-    .main-header {
-        font-size: 2.5rem;
-        color: var(--text-color) !important;
-        text-align: center;
-        margin-bottom: 2rem;
-        font-weight: 700;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.1);
-    }
-    
-    /* Dark mode specific text shadow for titles */
-    [data-theme="dark"] .main-header {
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-    }
-
-    /* Company header - theme aware */
-    .company-header {
-        background: linear-gradient(90deg, var(--secondary-bg), var(--card-bg));
-        color: var(--text-color) !important;
-        padding: 0.5rem 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-        font-weight: 600;
-        border-left: 4px solid var(--accent-color);
-    }
-    
-    /* Dark mode specific company header */
-    [data-theme="dark"] .company-header {
-        background: linear-gradient(90deg, #2c3e50, #34495e);
-        color: #ecf0f1 !important;
-    }
-
-    /* Warning box - theme aware */
-    .warning-box {
-        background-color: rgba(255, 193, 7, 0.15);
-        border: 1px solid var(--warning-color);
-        border-left: 5px solid var(--warning-color);
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 0.5rem 0;
-        color: var(--text-color) !important;
-    }
-    
-    /* Theme-specific warning box colors */
-    .warning-box strong, .warning-box b {
-        color: var(--warning-color) !important;
-    }
-    
-    [data-theme="dark"] .warning-box {
-        background-color: rgba(255, 193, 7, 0.2);
-        color: #ffd54f !important;
-    }
-
-    /* Insight box - theme aware */
-    .insight-box {
-        background-color: rgba(23, 162, 184, 0.15);
-        border: 1px solid var(--info-color);
-        border-left: 5px solid var(--info-color);
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 0.5rem 0;
-        color: var(--text-color) !important;
-    }
-    
-    /* Theme-specific insight box colors */
-    .insight-box strong, .insight-box b {
-        color: var(--info-color) !important;
-    }
-    
-    [data-theme="dark"] .insight-box {
-        background-color: rgba(23, 162, 184, 0.2);
-        color: #4dd0e1 !important;
-    }
-
-    /* Success box - theme aware */
-    .success-box {
-        background-color: rgba(40, 167, 69, 0.15);
-        border: 1px solid var(--success-color);
-        border-left: 5px solid var(--success-color);
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 0.5rem 0;
-        color: var(--text-color) !important;
-    }
-    
-    /* Theme-specific success box colors */
-    .success-box strong, .success-box b {
-        color: var(--success-color) !important;
-    }
-    
-    [data-theme="dark"] .success-box {
-        background-color: rgba(40, 167, 69, 0.2);
-        color: #6fcf97 !important;
-    }
-
-    /* Metric card - theme aware */
-    .metric-card {
-        background-color: var(--card-bg);
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid var(--accent-color);
-        margin: 0.5rem 0;
-        color: var(--text-color) !important;
-    }
-
-    /* Tab styling - theme aware */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2rem;
-        background-color: var(--secondary-bg) !important;
-    }
-
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        white-space: pre-wrap;
-        background-color: var(--secondary-bg);
-        border-radius: 5px 5px 0px 0px;
-        gap: 1px;
-        padding: 10px;
-        color: var(--text-color) !important;
-    }
-
-    .stTabs [aria-selected="true"] {
-        background-color: var(--accent-color) !important;
-    }
-
-    /* Dataframe styling - theme aware */
-    .stDataFrame {
-        background-color: rgba(0,0,0,0.05);
-    }
-    
-    [data-theme="dark"] .stDataFrame {
-        background-color: rgba(0,0,0,0.1);
-    }
-
-    /* Streamlit widget styling - theme aware */
-    .stSelectbox select, .stMultiselect div, 
-    .stSlider div, .stNumberInput input,
-    .stTextInput input, .stDateInput input,
-    .stTimeInput input, .stTextArea textarea {
-        background-color: var(--primary-bg) !important;
-        color: var(--text-color) !important;
-        border-color: var(--border-color) !important;
-    }
-    
-    /* Dropdown menus */
-    .stSelectbox div[role="listbox"], 
-    .stMultiselect div[role="listbox"] {
-        background-color: var(--primary-bg) !important;
-        color: var(--text-color) !important;
-        border-color: var(--border-color) !important;
-    }
-
-    /* Sidebar styling - theme aware */
-    section[data-testid="stSidebar"] {
-        background-color: var(--sidebar-bg) !important;
-        color: var(--text-color) !important;
-    }
-    
-    /* Sidebar text */
-    section[data-testid="stSidebar"] * {
-        color: var(--text-color) !important;
-    }
-
-    /* Plotly chart background fix */
-    .js-plotly-plot .plotly {
-        background-color: transparent !important;
-    }
-    
-    /* ============================================
-       ADDITIONAL THEME-SPECIFIC FIXES
-       ============================================ */
-    
-    /* Fix for metric values in light mode */
-    [data-theme="light"] .stMetric {
-        color: var(--text-color) !important;
-    }
-    
-    /* Fix for expander headers */
-    .streamlit-expanderHeader {
-        background-color: var(--secondary-bg) !important;
-        color: var(--text-color) !important;
-    }
-    
-    /* Fix for alerts and info boxes */
-    .stAlert {
-        background-color: var(--secondary-bg) !important;
-        color: var(--text-color) !important;
-        border-color: var(--border-color) !important;
-    }
-    
-    /* Fix for tables */
-    table, .dataframe {
-        background-color: var(--primary-bg) !important;
-        color: var(--text-color) !important;
-    }
-    
-    table th, table td, .dataframe th, .dataframe td {
-        color: var(--text-color) !important;
-        border-color: var(--border-color) !important;
-    }
-    
-    /* Fix for buttons */
-    .stButton button {
-        background-color: var(--accent-color) !important;
-        color: white !important;
-    }
-    
-    /* Fix for radio buttons and checkboxes */
-    .stRadio label, .stCheckbox label {
-        color: var(--text-color) !important;
-    }
-    
-    /* Fix for divider */
-    hr {
-        border-color: var(--border-color) !important;
-    }
-    
-    /* Fix for code blocks */
-    .stCodeBlock {
-        background-color: var(--secondary-bg) !important;
-        color: var(--text-color) !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Add CSS with theme-aware variables (read from disk once per process)
+st.markdown(f"<style>\n{load_css()}</style>", unsafe_allow_html=True)
+
+# Folder holding master_ratios.xlsx / master_inputs.xlsx (overridable for benchmarks)
+DATA_DIR = os.environ.get("RATIOS_DATA_DIR", "./pipeline")
+
+# Snapshot of the cleaned master tables (see pipeline/snapshot.py; serve.py pre-warms it)
+CACHE_DIR = os.environ.get("RATIOS_CACHE_DIR", "./.cache")
+
+# Rows of the deteriorations table rendered (largest relative moves first)
+MAX_DETERIORATION_ROWS = 200
+
+# Seconds between checks for master tables rewritten by pipeline.watch (0 disables)
+RELOAD_INTERVAL = float(os.environ.get("RATIOS_RELOAD_INTERVAL", "5"))
 
 # Title with custom styling
 st.markdown('<h1 class="main-header">Financial Ratios Dashboard - 3 Company Comparison</h1>', unsafe_allow_html=True)
 
 
-@st.cache_data
-def load_and_clean_data():
-    """Load and clean the financial data"""
+def master_source_key():
+    """Key of the master workbooks' current size and mtime (None if they are missing)"""
+    try:
+        return source_key(DATA_DIR)
+    except OSError:
+        return None
+
+
+@st.cache_data(max_entries=2)
+def load_and_clean_data(master_key):
+    """Load and clean the financial data (reloaded whenever the master workbooks change)"""
     try:
-        # Load data
-        master_df = pd.read_excel("./pipeline/master_ratios.xlsx")
-        master_inputs_df = pd.read_excel("./pipeline/master_inputs.xlsx")
-
-        # Clean column names
-        master_df.columns = master_df.columns.str.strip()
-        master_inputs_df.columns = master_inputs_df.columns.str.strip()
-
-        # Clean master_inputs - remove duplicate depreciation entries
-        master_inputs_df = master_inputs_df.drop_duplicates(subset=['item', 'company', '2023', '2024'], keep='first')
-
-        # Add some calculated metrics
-        # Calculate Cash Conversion Cycle
-        for company in master_df['company'].unique():
-            try:
-                dso = master_df.loc[(master_df['company'] == company) & 
-                                    (master_df['ratio_name'] == 'Days Sales Outstanding'), '2024'].values[0]
-                inventory_days = master_df.loc[(master_df['company'] == company) & 
-                                                (master_df['ratio_name'] == 'Days to Sell Inventory'), '2024'].values[0]
-                dpo = master_df.loc[(master_df['company'] == company) & 
-                                    (master_df['ratio_name'] == 'Days Payable Outstanding'), '2024'].values[0]
-                cash_cycle = dso + inventory_days - dpo
-
-                # Add to master_df
-                new_row = pd.DataFrame({
-                    'company': [company],
-                    'category': ['activity'],
-                    'ratio_name': ['Cash Conversion Cycle'],
-                    '2023': [np.nan],
-                    '2024': [cash_cycle]
-                })
-                master_df = pd.concat([master_df, new_row], ignore_index=True)
-            except:
-                pass
-        return master_df, master_inputs_df
+        return load_master_snapshot(DATA_DIR, CACHE_DIR)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None, None
 
 
+@st.cache_resource
+def get_upload_manager():
+    """One upload worker pool shared by every session of this server"""
+    return UploadManager(timings=timings)
+
+
+@st.cache_data(max_entries=2)
+def load_dataset(master_key, upload_version, _upload_manager):
+    """Base data merged with every uploaded company (cached per master and upload version)"""
+    master_df, master_inputs_df = load_and_clean_data(master_key)
+    if master_df is None or master_inputs_df is None:
+        return None, None
+
+    with timings.section("pipeline.merge_uploads"):
+        for company_inputs, company_ratios in _upload_manager.companies().values():
+            master_df, master_inputs_df = merge_company(master_df, master_inputs_df, company_ratios, company_inputs)
+
+    # Categorical labels and compact numbers: filters below compare integer codes
+    return compact_master_frames(master_df, master_inputs_df)
+
+
+@st.cache_resource(max_entries=2)
+def get_inputs_cube(data_version, _master_inputs_df):
+    """company × item × year array of master_inputs, pivoted once per data version"""
+    return MasterCube.from_frame(_master_inputs_df, 'item')
+
+
+@st.cache_resource(max_entries=2)
+def get_ratio_cube(data_version, _master_df):
+    """company × ratio × year array of master_df, pivoted once per data version"""
+    return MasterCube.from_frame(_master_df, 'ratio_name')
+
+
+@st.cache_resource(max_entries=2)
+def get_trend_set(data_version, _ratio_cube):
+    """Trend statistics for every company × ratio, computed once per data version"""
+    return TrendSet(_ratio_cube)
+
+
+@st.cache_data(max_entries=20)
+def get_scenario_summary(data_version, companies, year, shock_values, _inputs_cube, _ratio_cube):
+    """Every scenario of the grid evaluated for the selected companies in one batch"""
+    grid = scenario_grid(**dict(shock_values))
+    return len(grid), run_scenarios(_inputs_cube, list(companies), year, grid, _ratio_cube)
+
+
+@st.cache_data(max_entries=20)
+def get_company_scenarios(data_version, company, year, shock_values, _inputs_cube, _ratio_cube):
+    """Per-scenario ratios of one company, for the sensitivity heatmap"""
+    return company_scenarios(_inputs_cube, company, year, scenario_grid(**dict(shock_values)), _ratio_cube)
+
+
+# Comparison charts of the analysis views: builder(ratio_cube, companies, company_colors)
+ANALYSIS_CHARTS = {
+    'profitability': profitability_chart,
+    'liquidity': liquidity_chart,
+    'leverage': leverage_chart,
+    'asset_structure': lambda ratio_cube, companies, company_colors: asset_structure_chart(ratio_cube, companies),
+    'financing_structure': lambda ratio_cube, companies, company_colors: financing_structure_chart(ratio_cube, companies),
+}
+
+
+@st.cache_resource(max_entries=64)
+def get_analysis_chart(chart_name, data_version, companies, company_colors, _ratio_cube):
+    """
+    Chart of an analysis view, built once per data version, selection and colors.
+    Figures are shared by every session and never modified once built.
+    """
+    return ANALYSIS_CHARTS[chart_name](_ratio_cube, list(companies), company_colors)
+
+
+@st.cache_resource(max_entries=64)
+def get_trend_chart(data_version, companies, ratio, company_colors, _trend_set):
+    """History of one ratio for the selected companies, built once per data version, selection and colors"""
+    return trend_chart(_trend_set.series(list(companies), ratio), ratio, company_colors)
+
+
+@st.cache_data(max_entries=16)
+def get_deteriorations(data_version, companies, _trend_set):
+    """Significant moves in the wrong direction across every ratio of the selected companies"""
+    return _trend_set.deteriorations(list(companies))
+
+
+@st.cache_resource(max_entries=256)
+def get_efficiency_gauges(data_version, company, _ratio_cube):
+    """A company's efficiency gauges, built once per data version"""
+    return efficiency_gauges(_ratio_cube, company)
+
+
+@st.cache_resource(max_entries=2)
+def get_ratio_profile(data_version, year, _ratio_cube):
+    """Standardized company × ratio matrix of the whole universe, built once per data version"""
+    return RatioProfile(_ratio_cube, year)
+
+
+@st.cache_data(max_entries=2)
+def get_redundant_ratios(data_version, year, _profile):
+    """Ratio pairs carrying the same information across the universe"""
+    return _profile.redundant_pairs()
+
+
+@st.cache_resource(max_entries=2)
+def get_correlation_chart(data_version, year, _profile):
+    """Ratio correlation heatmap, built once per data version"""
+    return correlation_heatmap(_profile.correlation())
+
+
+@st.cache_data(max_entries=8)
+def get_clusters(data_version, year, n_clusters, _profile):
+    """k-means clusters of the universe: (company → cluster, cluster median ratios)"""
+    return cluster_companies(_profile, n_clusters)
+
+
+@st.cache_resource(max_entries=16)
+def get_cluster_map(data_version, year, n_clusters, companies, company_colors, _profile):
+    """Cluster scatter with the selected companies highlighted"""
+    assignments, _ = get_clusters(data_version, year, n_clusters, _profile)
+    return cluster_map(_profile.projection(), _profile.companies, assignments['cluster'].to_numpy(),
+                       list(companies), company_colors)
+
+
+@st.cache_data(max_entries=32)
+def get_peers(data_version, year, companies, n_clusters, _profile):
+    """Nearest peers of the selected companies, with the cluster of each peer"""
+    peers = _profile.peers(list(companies))
+    assignments, _ = get_clusters(data_version, year, n_clusters, _profile)
+    peers['cluster'] = assignments.set_index('company')['cluster'].reindex(peers['peer']).to_numpy()
+    return peers
+
+
 # Load data
-master_df, master_inputs_df = load_and_clean_data()
+with timings.section("data_load"):
+    upload_manager = get_upload_manager()
+    upload_manager.collect()
+    master_key = master_source_key()
+    data_version = (master_key, upload_manager.version)
+    master_df, master_inputs_df = load_dataset(master_key, upload_manager.version, upload_manager)
 
 if master_df is None or master_inputs_df is None:
     st.stop()
 
+with timings.section("data_cubes"):
+    ratio_cube = get_ratio_cube(data_version, master_df)
+    trend_set = get_trend_set(data_version, ratio_cube)
+
+
+def upload_status(job_ids, polling):
+    """This session's upload jobs; polls the worker pool while any are pending"""
+    upload_manager.collect()
+    if upload_manager.version != data_version[1] or (polling and not upload_manager.pending(job_ids)):
+        # New companies are ready (or the queue drained): rerun with the merged dataset
+        st.rerun()
+
+    jobs = upload_manager.jobs(job_ids)
+    if not jobs:
+        return
+
+    finished = sum(job['status'] in ('done', 'failed') for job in jobs)
+    st.progress(finished / len(jobs), text=f"Processed {finished} of {len(jobs)} workbooks")
+    for job in jobs:
+        if job['status'] == 'failed':
+            st.error(f"{job['filename']}: {job['error']}")
+        elif job['status'] == 'done':
+            st.caption(f"✅ {job['filename']} → {job['company']}")
+        else:
+            st.caption(f"⏳ {job['filename']} ({job['status']})")
+
+
+def watch_master_files():
+    """Rerun with the new data once pipeline.watch has replaced the master workbooks"""
+    if master_source_key() != master_key:
+        st.rerun()
+
+
 # Sidebar controls
 with st.sidebar:
     st.header("Dashboard Controls")
@@ -345,6 +281,8 @@ with st.sidebar:
     st.subheader("Display Options")
     show_raw_data = st.checkbox("Show Raw Data", value=False)
     show_insights = st.checkbox("Show Insights", value=True)
+    show_scenarios = st.checkbox("Scenario Mode", value=False)
+    show_stress = st.checkbox("Stress Test", value=False)
 
     # Color scheme selection
     color_scheme = st.selectbox(
@@ -352,45 +290,58 @@ with st.sidebar:
         ["Corporate", "Bright", "Pastel", "Monochrome"]
     )
 
-    # Color mapping based on selection
-    if color_scheme == "Corporate":
-        company_colors = {'BORYSZEW': '#1f77b4', 'FASING': '#ff7f0e', 'FEERUM': '#2ca02c'}
-    elif color_scheme == "Bright":
-        company_colors = {'BORYSZEW': '#e41a1c', 'FASING': '#377eb8', 'FEERUM': '#4daf4a'}
-    elif color_scheme == "Pastel":
-        company_colors = {'BORYSZEW': '#a6cee3', 'FASING': '#b2df8a', 'FEERUM': '#fb9a99'}
-    else:
-        company_colors = {'BORYSZEW': '#636363', 'FASING': '#969696', 'FEERUM': '#cccccc'}
+    # Companies outside the scheme (e.g. uploads) get colors from the Plotly palette
+    company_colors = company_color_map(color_scheme, all_companies)
 
-# Main dashboard content
+    # Upload new statements (same 'YC' layout as BORYSZEW.xlsx)
+    st.subheader("Upload Statements")
+    uploaded_files = st.file_uploader(
+        "Statement workbooks (.xlsx)",
+        type=["xlsx"],
+        accept_multiple_files=True
+    )
+    upload_jobs = st.session_state.setdefault("upload_jobs", {})
+    for uploaded_file in uploaded_files or []:
+        if uploaded_file.file_id not in upload_jobs:
+            upload_jobs[uploaded_file.file_id] = upload_manager.submit(uploaded_file.name, uploaded_file.getvalue())
 
-# Row 1: Executive Summary with Alerts
-st.header("Executive Summary & Alerts")
+    job_ids = list(upload_jobs.values())
+    polling = upload_manager.pending(job_ids) > 0
+    st.fragment(upload_status, run_every=1.0 if polling else None)(job_ids, polling)
+
+    if RELOAD_INTERVAL > 0:
+        st.fragment(watch_master_files, run_every=RELOAD_INTERVAL)()
 
-# Calculate alerts for each company
-alerts = []
-for company in selected_companies:
-    company_data = master_df[master_df['company'] == company]
+# Main dashboard content
 
-    # Check for negative interest coverage
-    interest_coverage = company_data[company_data['ratio_name'] == 'Interest Coverage Ratio']['2024'].values[0]
-    if interest_coverage < 0:
-        alerts.append(f"{company}: Negative Interest Coverage ({interest_coverage:.2f})")
+# Row 1: Executive Summary with Alerts
+with timings.section("alerts"):
+    st.header("Executive Summary & Alerts")
+
+    # Calculate alerts for each company (one block lookup for all selected companies)
+    alerts = []
+    alert_values = ratio_cube.select(
+        selected_companies,
+        ['Interest Coverage Ratio', 'Current Ratio', 'Net Profit Margin'],
+        '2024'
+    )
+    for company, (interest_coverage, current_ratio, net_margin) in zip(selected_companies, alert_values):
+        # Check for negative interest coverage
+        if interest_coverage < 0:
+            alerts.append(f"{company}: Negative Interest Coverage ({interest_coverage:.2f})")
 
-    # Check for low liquidity
-    current_ratio = company_data[company_data['ratio_name'] == 'Current Ratio']['2024'].values[0]
-    if current_ratio < 1.2:
-        alerts.append(f"{company}: Low Current Ratio ({current_ratio:.2f})")
+        # Check for low liquidity
+        if current_ratio < 1.2:
+            alerts.append(f"{company}: Low Current Ratio ({current_ratio:.2f})")
 
-    # Check for negative margins
-    net_margin = company_data[company_data['ratio_name'] == 'Net Profit Margin']['2024'].values[0]
-    if net_margin < 0:
-        alerts.append(f"{company}: Negative Net Margin ({net_margin:.1%})")
+        # Check for negative margins
+        if net_margin < 0:
+            alerts.append(f"{company}: Negative Net Margin ({net_margin:.1%})")
 
-if alerts:
-    with st.expander("Critical Alerts", expanded=True):
-        for alert in alerts:
-            st.markdown(f'<div class="warning-box">{alert}</div>', unsafe_allow_html=True)
+    if alerts:
+        with st.expander("Critical Alerts", expanded=True):
+            for alert in alerts:
+                st.markdown(f'<div class="warning-box">{alert}</div>', unsafe_allow_html=True)
 
 # Row 2: Key Financial Metrics
 st.header("Key Financial Metrics")
@@ -399,571 +350,518 @@ st.header("Key Financial Metrics")
 kpi_cols = st.columns(4)
 
 
-# Helper function to safely get ratio values
+# Helper function to safely get ratio values (None if the company has no such ratio)
 def get_ratio_value(company, ratio_name, year):
-    try:
-        value = master_df.loc[
-            (master_df['company'] == company) &
-            (master_df['ratio_name'] == ratio_name),
-            year
-        ].values[0]
-        return value
-    except:
-        return None
+    return ratio_cube.value(company, ratio_name, year)
+
+
+def ratio_format(ratio_name):
+    """Display format of a ratio, chosen from its name"""
+    percent_ratios = ['Margin', 'Ratio', 'Holdings']
+    if any(term in ratio_name for term in percent_ratios):
+        return "{:.1%}"
+    if 'Days' in ratio_name or 'Working Capital' in ratio_name:
+        return "{:,.0f}"
+    return "{:.2f}"
+
+
+def format_ratio_table(display_df):
+    """Copy of a ratio table with the year columns formatted as display strings"""
+    formatted_df = display_df.copy()
+
+    # One format per ratio name, looked up for each row through its category code
+    formats = np.array([ratio_format(name) for name in display_df['ratio_name'].cat.categories], dtype=object)
+    row_formats = formats[display_df['ratio_name'].cat.codes.to_numpy()]
+
+    for year in ['2023', '2024']:
+        if year in formatted_df.columns:
+            formatted_df[year] = [
+                fmt.format(value) if not np.isnan(value) else None
+                for fmt, value in zip(row_formats, display_df[year].to_numpy())
+            ]
+    return formatted_df
+
+
+@st.cache_data(max_entries=32)
+def get_ratio_table(data_version, companies, category, _master_df):
+    """Formatted All Data table for a company selection and category"""
+    display_df = _master_df
+
+    if companies:
+        display_df = display_df[display_df['company'].isin(companies)]
+
+    if category != "All Categories":
+        display_df = display_df[display_df['category'] == category]
+
+    return format_ratio_table(display_df)
 
 
 # Display KPIs for first selected company
-if selected_companies:
-    ref_company = selected_companies[0]
-
-    # Current Ratio KPI
-    with kpi_cols[0]:
-        cr_2024 = get_ratio_value(ref_company, "Current Ratio", "2024")
-        cr_2023 = get_ratio_value(ref_company, "Current Ratio", "2023")
-        delta_cr = (cr_2024 - cr_2023) if (cr_2024 and cr_2023) else None
-        st.metric(
-            "Current Ratio",
-            f"{cr_2024:.2f}" if cr_2024 else "N/A",
-            f"{delta_cr:+.2f}" if delta_cr is not None else None,
-            delta_color="inverse" if delta_cr and delta_cr < 0 else "normal"
-        )
+with timings.section("kpis"):
+    if selected_companies:
+        ref_company = selected_companies[0]
+
+        # (label, ratio, value format, delta format); deltas come from the trend engine,
+        # so a 0.0 ratio or change is shown rather than treated as missing
+        kpi_specs = [
+            ("Current Ratio", "Current Ratio", "{:.2f}", "{:+.2f}"),
+            ("Debt to Equity", "Debt to Equity Ratio", "{:.2f}", "{:+.2f}"),
+            ("Net Profit Margin", "Net Profit Margin", "{:.1%}", "{:+.1%}"),
+            ("Asset Turnover", "Asset Turnover Ratio", "{:.2f}", "{:+.2f}"),
+        ]
+        for kpi_col, (label, ratio_name, value_format, delta_format) in zip(kpi_cols, kpi_specs):
+            with kpi_col:
+                value = get_ratio_value(ref_company, ratio_name, "2024")
+                delta = trend_set.last_change(ref_company, ratio_name)
+                st.metric(
+                    label,
+                    value_format.format(value) if value is not None and not np.isnan(value) else "N/A",
+                    delta_format.format(delta) if delta is not None else None,
+                    # Red for a move in the wrong direction (e.g. rising debt to equity)
+                    delta_color="inverse" if ratio_direction(ratio_name) < 0 else "normal"
+                )
 
-    # Debt to Equity KPI
-    with kpi_cols[1]:
-        dte_2024 = get_ratio_value(ref_company, "Debt to Equity Ratio", "2024")
-        dte_2023 = get_ratio_value(ref_company, "Debt to Equity Ratio", "2023")
-        delta_dte = (dte_2024 - dte_2023) if (dte_2024 and dte_2023) else None
-        st.metric(
-            "Debt to Equity",
-            f"{dte_2024:.2f}" if dte_2024 else "N/A",
-            f"{delta_dte:+.2f}" if delta_dte is not None else None,
-            delta_color="inverse" if delta_dte and delta_dte > 0 else "normal"
-        )
+# Row 2b: Historical trends for any ratio
+with timings.section("trends"):
+    st.header("Ratio Trends")
 
-    # Net Profit Margin KPI
-    with kpi_cols[2]:
-        npm_2024 = get_ratio_value(ref_company, "Net Profit Margin", "2024")
-        npm_2023 = get_ratio_value(ref_company, "Net Profit Margin", "2023")
-        delta_npm = (npm_2024 - npm_2023) if (npm_2024 and npm_2023) else None
-        st.metric(
-            "Net Profit Margin",
-            f"{npm_2024:.1%}" if npm_2024 else "N/A",
-            f"{delta_npm:+.1%}" if delta_npm is not None else None,
-            delta_color="inverse" if delta_npm and delta_npm < 0 else "normal"
-        )
+    if selected_companies:
+        trend_col1, trend_col2 = st.columns([3, 2])
 
-    # Asset Turnover KPI
-    with kpi_cols[3]:
-        at_2024 = get_ratio_value(ref_company, "Asset Turnover Ratio", "2024")
-        at_2023 = get_ratio_value(ref_company, "Asset Turnover Ratio", "2023")
-        delta_at = (at_2024 - at_2023) if (at_2024 and at_2023) else None
-        st.metric(
-            "Asset Turnover",
-            f"{at_2024:.2f}" if at_2024 else "N/A",
-            f"{delta_at:+.2f}" if delta_at is not None else None,
-            delta_color="inverse" if delta_at and delta_at < 0 else "normal"
-        )
+        with trend_col2:
+            trend_ratio = st.selectbox(
+                "Ratio",
+                trend_set.ratios,
+                index=trend_set.ratio_index.get("Current Ratio", 0)
+            )
+            trend_table = trend_set.table(selected_companies, [trend_ratio])
+            st.dataframe(
+                trend_table[['Company', 'Trend', 'Latest', 'Change', 'Change %', 'CAGR', 'Slope']].style.format({
+                    'Latest': "{:.2f}", 'Change': "{:+.2f}", 'Change %': "{:+.1%}",
+                    'CAGR': "{:+.1%}", 'Slope': "{:+.3f}"
+                }, na_rep="–"),
+                use_container_width=True,
+                hide_index=True
+            )
 
-# Row 3: Main Visualizations - Tabs
-st.header("Financial Analysis")
+        with trend_col1:
+            fig_trend = get_trend_chart(data_version, tuple(selected_companies), trend_ratio, company_colors, trend_set)
+            st.plotly_chart(fig_trend, use_container_width=True)
+
+        deteriorations = get_deteriorations(data_version, tuple(selected_companies), trend_set)
+        if not deteriorations.empty:
+            with st.expander(f"Significant deteriorations ({len(deteriorations)})"):
+                # Styling costs time per cell on every rerun: show the largest moves only
+                if len(deteriorations) > MAX_DETERIORATION_ROWS:
+                    st.caption(f"Largest {MAX_DETERIORATION_ROWS} of {len(deteriorations)} deteriorations")
+                st.dataframe(
+                    deteriorations.head(MAX_DETERIORATION_ROWS)[
+                        ['Company', 'Ratio', 'Trend', 'Latest', 'Change', 'Change %']
+                    ].style.format({
+                        'Latest': "{:.2f}", 'Change': "{:+.2f}", 'Change %': "{:+.1%}"
+                    }, na_rep="–"),
+                    use_container_width=True,
+                    hide_index=True
+                )
 
-# Create tabs for different analyses
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "Profitability",
-    "Liquidity & Leverage",
-    "Efficiency",
-    "Structure",
-    "All Data"
-])
-
-with tab1:
-    # Profitability Analysis
-    st.subheader("Profitability Margins Comparison")
-
-    # Filter profitability ratios
-    profit_ratios = ["Gross Margin", "Operating Margin", "EBIT Margin", "Net Profit Margin"]
-    profit_data = []
-
-    for company in selected_companies:
-        for ratio in profit_ratios:
-            val_2024 = get_ratio_value(company, ratio, "2024")
-            val_2023 = get_ratio_value(company, ratio, "2023")
-
-            if val_2024 is not None:
-                profit_data.append({
-                    'Company': company,
-                    'Ratio': ratio,
-                    'Year': '2024',
-                    'Value': val_2024,
-                    'Color': company_colors[company]
-                })
-            if val_2023 is not None:
-                profit_data.append({
-                    'Company': company,
-                    'Ratio': ratio,
-                    'Year': '2023',
-                    'Value': val_2023,
-                    'Color': company_colors[company]
-                })
-
-    if profit_data:
-        profit_df = pd.DataFrame(profit_data)
-
-        # Create grouped bar chart
-        fig_profit = px.bar(
-            profit_df,
-            x='Ratio',
-            y='Value',
-            color='Company',
-            facet_col='Year',
-            barmode='group',
-            color_discrete_map=company_colors,
-            title="Profitability Margins Comparison"
+# Row 2c: What-if scenarios (shocks to the 2024 inputs, evaluated as one batch)
+with timings.section("scenarios"):
+    if show_scenarios and selected_companies:
+        st.header("What-if Scenarios")
+
+        inputs_cube = get_inputs_cube(data_version, master_inputs_df)
+        scenario_companies = [company for company in selected_companies if company in inputs_cube.company_index]
+
+        shock_col1, shock_col2, shock_col3 = st.columns(3)
+        with shock_col1:
+            revenue_range = st.slider("Revenue change (%)", -50, 50, (-20, 10), step=5)
+            margin_range = st.slider("Gross margin change (pts)", -10, 10, (-5, 5))
+        with shock_col2:
+            payable_range = st.slider("Payables stretched (days)", 0, 60, (0, 30), step=5)
+            receivable_range = st.slider("Receivables stretched (days)", 0, 60, (0, 30), step=5)
+        with shock_col3:
+            inventory_range = st.slider("Inventory build-up (days)", 0, 60, (0, 0), step=5)
+            grid_points = st.slider("Grid points per shock", 3, 15, 9)
+
+        def shock_axis(value_range, scale=1.0):
+            return tuple(np.unique(np.linspace(value_range[0], value_range[1], grid_points)) * scale)
+
+        # Hashable grid definition: cache key of the batch evaluation
+        shock_values = (
+            ('revenue', shock_axis(revenue_range, 0.01)),
+            ('gross_margin', shock_axis(margin_range, 0.01)),
+            ('payable_days', shock_axis(payable_range)),
+            ('receivable_days', shock_axis(receivable_range)),
+            ('inventory_days', shock_axis(inventory_range)),
         )
-        fig_profit.update_yaxes(tickformat=".1%")
-        fig_profit.update_layout(height=500, showlegend=True)
-        st.plotly_chart(fig_profit, use_container_width=True)
-
-        # Profitability insights
-        if show_insights:
-            with st.expander("📝 Profitability Insights"):
-                insights = []
-                for company in selected_companies:
-                    npm = get_ratio_value(company, "Net Profit Margin", "2024")
-                    opm = get_ratio_value(company, "Operating Margin", "2024")
-                    if npm and opm:
-                        tax_efficiency = npm / opm if opm != 0 else 0
-                        insights.append(f"{company}: Net margin is {npm:.1%} of operating margin (tax/interest efficiency: {tax_efficiency:.1%})")
-                for insight in insights:
-                    st.markdown(f'<div class="insight-box">{insight}</div>', unsafe_allow_html=True)
-
-with tab2:
-    # Liquidity & Leverage Analysis
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Liquidity Ratios")
-
-        liquidity_data = []
-        for company in selected_companies:
-            cr = get_ratio_value(company, "Current Ratio", "2024")
-            qr = get_ratio_value(company, "Quick Ratio", "2024")
-
-            if cr and qr:
-                liquidity_data.append({
-                    'Company': company,
-                    'Current Ratio': cr,
-                    'Quick Ratio': qr
-                })
-
-        if liquidity_data:
-            liquidity_df = pd.DataFrame(liquidity_data)
-
-            # Create scatter plot for liquidity
-            fig_liquidity = px.scatter(
-                liquidity_df,
-                x='Current Ratio',
-                y='Quick Ratio',
-                color='Company',
-                size=[100] * len(liquidity_df),
-                hover_name='Company',
-                color_discrete_map=company_colors,
-                title="Current vs Quick Ratio (2024)"
+
+        if scenario_companies:
+            n_scenarios, scenario_summary = get_scenario_summary(
+                data_version, tuple(scenario_companies), '2024', shock_values, inputs_cube, ratio_cube
             )
+            st.caption(f"{n_scenarios:,} scenarios × {len(scenario_companies)} companies, 2024 inputs")
+
+            summary_col1, summary_col2 = st.columns(2)
+            with summary_col1:
+                st.subheader("Share of Scenarios Triggering Alerts")
+                st.dataframe(
+                    scenario_summary['alert_share'].style.format("{:.0%}"),
+                    use_container_width=True
+                )
 
-            # Add reference lines
-            fig_liquidity.add_hline(y=1, line_dash="dash", line_color="gray")
-            fig_liquidity.add_vline(x=1.5, line_dash="dash", line_color="gray")
+            with summary_col2:
+                st.subheader("Baseline vs Worst Case")
+                key_ratios = ['Current Ratio', 'Interest Coverage Ratio', 'Debt to Equity Ratio',
+                              'Net Profit Margin', 'Cash Holdings Ratio']
+                worst_case = pd.concat({
+                    'Baseline': scenario_summary['baseline'][key_ratios].stack(),
+                    'Worst': scenario_summary['worst'][key_ratios].stack(),
+                }, axis=1).rename_axis(['Company', 'Ratio']).reset_index()
+                st.dataframe(
+                    worst_case.style.format({'Baseline': "{:.3f}", 'Worst': "{:.3f}"}, na_rep="–"),
+                    use_container_width=True,
+                    hide_index=True
+                )
 
-            # Add quadrant labels
-            fig_liquidity.add_annotation(
-                x=0.5, y=2,
-                text="High Quality Liquidity",
-                showarrow=False
+            # Sensitivity of one ratio to revenue and payables, other shocks held fixed
+            st.subheader("Sensitivity Heatmap")
+            heat_col1, heat_col2, heat_col3, heat_col4 = st.columns(4)
+            with heat_col1:
+                heat_company = st.selectbox("Company", scenario_companies, key="scenario_company")
+            with heat_col2:
+                heat_ratio = st.selectbox("Ratio", list(scenario_summary['baseline'].columns), key="scenario_ratio")
+            with heat_col3:
+                fixed_margin = st.select_slider(
+                    "Gross margin change", dict(shock_values)['gross_margin'],
+                    value=min(dict(shock_values)['gross_margin'], key=abs), format_func=lambda v: f"{v * 100:+.1f} pts"
                 )
-            fig_liquidity.add_annotation(
-                x=2.5,
-                y=0.5,
-                text="Inventory Dependent",
-                showarrow=False
+            with heat_col4:
+                fixed_receivables = st.select_slider(
+                    "Receivables stretched", dict(shock_values)['receivable_days'],
+                    value=min(dict(shock_values)['receivable_days'], key=abs), format_func=lambda v: f"{v:.0f} days"
                 )
 
-            fig_liquidity.update_layout(height=400)
-            st.plotly_chart(fig_liquidity, use_container_width=True)
-
-    with col2:
-        st.subheader("Leverage Ratios")
-
-        leverage_data = []
-        for company in selected_companies:
-            dte = get_ratio_value(company, "Debt to Equity Ratio", "2024")
-            eq_ratio = get_ratio_value(company, "Equity Ratio", "2024")
-
-            if dte and eq_ratio:
-                leverage_data.append({
-                    'Company': company,
-                    'Debt to Equity': dte,
-                    'Equity Ratio': eq_ratio
-                })
-
-        if leverage_data:
-            leverage_df = pd.DataFrame(leverage_data)
-
-            # Create bar chart for leverage
-            fig_leverage = go.Figure()
-
-            for i, company in enumerate(selected_companies):
-                company_data = leverage_df[leverage_df['Company'] == company]
-                if not company_data.empty:
-                    fig_leverage.add_trace(go.Bar(
-                        name=company,
-                        x=['Debt/Equity', 'Equity Ratio'],
-                        y=[company_data['Debt to Equity'].values[0],
-                            company_data['Equity Ratio'].values[0]],
-                        marker_color=company_colors[company]
-                    ))
-
-            fig_leverage.update_layout(
-                title="Leverage Analysis (2024)",
-                barmode='group',
-                height=400,
-                yaxis_tickformat=".2f"
+            company_grid = get_company_scenarios(data_version, heat_company, '2024', shock_values, inputs_cube, ratio_cube)
+            fixed_inventory = min(dict(shock_values)['inventory_days'], key=abs)
+            surface = company_grid[
+                (company_grid['gross_margin'] == fixed_margin) &
+                (company_grid['receivable_days'] == fixed_receivables) &
+                (company_grid['inventory_days'] == fixed_inventory)
+            ].pivot_table(index='payable_days', columns='revenue', values=heat_ratio, dropna=False)
+
+            fig_heat = sensitivity_heatmap(surface, heat_company, heat_ratio, ratio_direction(heat_ratio))
+            st.plotly_chart(fig_heat, use_container_width=True)
+
+# Row 2d: Monte Carlo stress test (precomputed with `python -m stress`, cached per data version)
+with timings.section("stress_test"):
+    if show_stress and selected_companies:
+        st.header("Stress Test: Probability of Critical Breaches")
+
+        stress_paths = 100_000
+        inputs_cube = get_inputs_cube(data_version, master_inputs_df)
+        stress_companies = list(inputs_cube.companies)
+        stress_results = load_cached(stress_key(
+            base_items(inputs_cube, stress_companies, '2024', ratio_cube), stress_companies, '2024', stress_paths, 0
+        ))
+
+        if stress_results is None:
+            st.info(f"No cached stress test for the current data ({len(stress_companies)} companies).")
+            if st.button(f"Run stress test ({stress_paths:,} paths per company)"):
+                with st.spinner("Simulating..."):
+                    stress_results = stress_test(inputs_cube, stress_companies, '2024', stress_paths,
+                                                 ratio_cube=ratio_cube)
+
+        if stress_results is not None:
+            shown = stress_results.loc[[c for c in selected_companies if c in stress_results.index]]
+            long_results = shown.drop(columns=[ANY_BREACH]).rename_axis('Company').reset_index().melt(
+                id_vars='Company', var_name='Breach', value_name='Probability'
             )
-            st.plotly_chart(fig_leverage, use_container_width=True)
 
-with tab3:
-    # Efficiency Analysis
-    st.subheader("Efficiency Metrics")
-    
-    # Create gauge charts for efficiency metrics (keeping your original design)
-    efficiency_ratios = [
-        ("Days Sales Outstanding", "DSO", "days"),
-        ("Days to Sell Inventory", "Inventory Days", "days"),
-        ("Days Payable Outstanding", "DPO", "days"),
-        ("Asset Turnover Ratio", "Asset Turnover", "ratio"),
-        ("Cash Conversion Cycle", "Cash Cycle", "days")
-    ]
-    
-    # Create columns for each company
-    company_cols = st.columns(len(selected_companies))
-    
-    for idx, company in enumerate(selected_companies):
-        with company_cols[idx]:
-            st.markdown(
-                f'<div class="company-header">{company}</div>',
-                unsafe_allow_html=True
+            stress_col1, stress_col2 = st.columns([3, 2])
+            with stress_col1:
+                st.plotly_chart(breach_probability_chart(long_results, company_colors), use_container_width=True)
+
+            with stress_col2:
+                st.dataframe(
+                    shown.style.format("{:.1%}"),
+                    use_container_width=True
+                )
+                st.caption(
+                    f"{stress_paths:,} correlated revenue, margin and working-capital shock paths per company; "
+                    f"largest standard error {standard_error(shown, stress_paths).to_numpy().max():.2%}."
                 )
 
-            for ratio_fullname, short_name, unit in efficiency_ratios:
-                val_2024 = get_ratio_value(company, ratio_fullname, "2024")
-                val_2023 = get_ratio_value(company, ratio_fullname, "2023")
-
-                if val_2024 is None:
-                    continue
-
-                # Determine gauge settings based on metric type
-                if unit == "days":
-                    gauge_max = max(150, val_2024 * 1.5)
-                    ranges = [
-                        {'range': [0, 30], 'color': "lightgreen"},
-                        {'range': [30, 60], 'color': "yellow"},
-                        {'range': [60, gauge_max], 'color': "red"}
-                    ]
-                else:
-                    gauge_max = max(2.0, val_2024 * 1.5)
-                    ranges = [
-                        {'range': [0, 0.5], 'color': "red"},
-                        {'range': [0.5, 1.0], 'color': "yellow"},
-                        {'range': [1.0, gauge_max], 'color': "lightgreen"}
-                    ]
-
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number+delta",
-                    value=val_2024,
-                    title={'text': f"{short_name}", 'font': {'size': 14}},
-                    delta={'reference': val_2023 if val_2023 else 0,
-                            'increasing': {'color': "red"},
-                            'decreasing': {'color': "green"}},
-                    gauge={
-                        'axis': {'range': [0, gauge_max]},
-                        'steps': ranges,
-                        'threshold': {
-                            'line': {'color': "black", 'width': 3},
-                            'thickness': 0.8,
-                            'value': val_2024
-                        }
-                    }
-                ))
-                fig.update_layout(width=300, height=200, margin=dict(t=50, b=10, l=10, r=10))
-                st.plotly_chart(fig, use_container_width=True)
-
-with tab4:
-    # Financial Structure Analysis
-    st.subheader("Financial Structure Composition")
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("#### Asset Structure (2024)")
-
-        asset_data = []
-        for company in selected_companies:
-            nc_assets = get_ratio_value(company, "Non-current Assets Ratio", "2024")
-            c_assets = get_ratio_value(company, "Current Assets Ratio", "2024")
-
-            if nc_assets and c_assets:
-                asset_data.append({
-                    'Company': company,
-                    'Type': 'Non-current Assets',
-                    'Value': nc_assets
-                })
-                asset_data.append({
-                    'Company': company,
-                    'Type': 'Current Assets',
-                    'Value': c_assets
-                })
-
-        if asset_data:
-            asset_df = pd.DataFrame(asset_data)
-
-            fig_assets = px.bar(
-                asset_df,
-                x='Company',
-                y='Value',
-                color='Type',
-                barmode='stack',
-                color_discrete_sequence=['#1f77b4', '#ff7f0e'],
-                title="Asset Composition"
-            )
-            fig_assets.update_yaxes(tickformat=".0%")
-            fig_assets.update_layout(height=400)
-            st.plotly_chart(fig_assets, use_container_width=True)
-
-    with col2:
-        st.markdown("#### Financing Structure (2024)")
-
-        financing_data = []
-        for company in selected_companies:
-            equity = get_ratio_value(company, "Equity Ratio", "2024")
-            nc_liab = get_ratio_value(company, "Non-current Liabilities Ratio", "2024")
-            c_liab = get_ratio_value(company, "Current Liabilities Ratio", "2024")
-
-            if equity and nc_liab and c_liab:
-                financing_data.append({
-                    'Company': company,
-                    'Type': 'Equity',
-                    'Value': equity
-                })
-                financing_data.append({
-                    'Company': company,
-                    'Type': 'Non-current Liabilities',
-                    'Value': nc_liab
-                })
-                financing_data.append({
-                    'Company': company,
-                    'Type': 'Current Liabilities',
-                    'Value': c_liab
-                })
-
-        if financing_data:
-            financing_df = pd.DataFrame(financing_data)
-            
-            fig_financing = px.bar(
-                financing_df,
-                x='Company',
-                y='Value',
-                color='Type',
-                barmode='stack',
-                color_discrete_sequence=['#2ca02c', '#d62728', '#9467bd'],
-                title="Financing Structure"
-            )
-            fig_financing.update_yaxes(tickformat=".0%")
-            fig_financing.update_layout(height=400)
-            st.plotly_chart(fig_financing, use_container_width=True)
+# Row 3: Main Visualizations - Tabs
+st.header("Financial Analysis")
+
+# One analysis view at a time: only the selected view's charts are built on a rerun
+analysis_view = st.radio(
+    "Analysis view",
+    ["Profitability", "Liquidity & Leverage", "Efficiency", "Structure", "Comparative Analysis", "All Data"],
+    horizontal=True,
+    key="analysis_view",
+    label_visibility="collapsed"
+)
 
-with tab5:
-    # All Data tab
-    st.subheader("Complete Ratio Data")
+if analysis_view == "Profitability":
+    with timings.section("tab1_profitability"):
+        # Profitability Analysis
+        st.subheader("Profitability Margins Comparison")
+
+        fig_profit = get_analysis_chart('profitability', data_version, tuple(selected_companies), company_colors, ratio_cube)
+        if fig_profit is not None:
+            st.plotly_chart(fig_profit, use_container_width=True)
+
+            # Profitability insights
+            if show_insights:
+                with st.expander("📝 Profitability Insights"):
+                    insights = []
+                    for company in selected_companies:
+                        npm = get_ratio_value(company, "Net Profit Margin", "2024")
+                        opm = get_ratio_value(company, "Operating Margin", "2024")
+                        if npm and opm:
+                            tax_efficiency = npm / opm if opm != 0 else 0
+                            insights.append(f"{company}: Net margin is {npm:.1%} of operating margin (tax/interest efficiency: {tax_efficiency:.1%})")
+                    for insight in insights:
+                        st.markdown(f'<div class="insight-box">{insight}</div>', unsafe_allow_html=True)
+
+if analysis_view == "Liquidity & Leverage":
+    with timings.section("tab2_liquidity_leverage"):
+        # Liquidity & Leverage Analysis
+        col1, col2 = st.columns(2)
 
-    # Filter data based on selections
-    display_df = master_df.copy()
+        with col1:
+            st.subheader("Liquidity Ratios")
 
-    if selected_companies:
-        display_df = display_df[display_df['company'].isin(selected_companies)]
+            fig_liquidity = get_analysis_chart('liquidity', data_version, tuple(selected_companies), company_colors, ratio_cube)
+            if fig_liquidity is not None:
+                st.plotly_chart(fig_liquidity, use_container_width=True)
 
-    if selected_category != "All Categories":
-        display_df = display_df[display_df['category'] == selected_category]
+        with col2:
+            st.subheader("Leverage Ratios")
 
-    # Format the display
-    formatted_df = display_df.copy()
+            fig_leverage = get_analysis_chart('leverage', data_version, tuple(selected_companies), company_colors, ratio_cube)
+            if fig_leverage is not None:
+                st.plotly_chart(fig_leverage, use_container_width=True)
 
-    # Format percentage columns for specific ratios
-    percent_ratios = ['Margin', 'Ratio', 'Holdings']
-    for idx, row in formatted_df.iterrows():
-        for year in ['2023', '2024']:
-            if year in formatted_df.columns:
-                if any(term in row['ratio_name'] for term in percent_ratios):
-                    try:
-                        formatted_df.at[idx, year] = f"{float(row[year]):.1%}"
-                    except:
-                        pass
-                elif 'Days' in row['ratio_name'] or 'Working Capital' in row['ratio_name']:
-                    try:
-                        formatted_df.at[idx, year] = f"{float(row[year]):,.0f}"
-                    except:
-                        pass
-                else:
-                    try:
-                        formatted_df.at[idx, year] = f"{float(row[year]):.2f}"
-                    except:
-                        pass
-
-    st.dataframe(
-        formatted_df,
-        use_container_width=True,
-        height=600
-    )
+if analysis_view == "Efficiency":
+    with timings.section("tab3_efficiency"):
+        # Efficiency Analysis
+        st.subheader("Efficiency Metrics")
 
-# Row 4: Cash Flow Analysis (using master_inputs)
-st.header("Cash Flow Analysis")
-
-if len(selected_companies) > 0:
-    # Get cash flow items
-    cash_flow_items = ['operating_cash_flow', 'investing_cash_flow', 'financing_cash_flow', 'net_cash_flow']
-
-    # Prepare cash flow data
-    cash_data = []
-    for company in selected_companies[:3]:  # Limit to 3 for space
-        company_cash = master_inputs_df[master_inputs_df['company'] == company]
-        company_cash = company_cash[company_cash['item'].isin(cash_flow_items)]
-
-        for _, row in company_cash.iterrows():
-            cash_data.append({
-                'Company': company,
-                'Cash Flow Type': row['item'].replace('_', ' ').title(),
-                '2023': row['2023'],
-                '2024': row['2024']
-            })
-
-    if cash_data:
-        cash_df = pd.DataFrame(cash_data)
-
-        # Create waterfall charts for each company
-        st.subheader("Cash Flow Components")
-
-        for company in selected_companies[:2]:  # Show first 2 companies
-            st.markdown(f"{company}")
-
-            company_cash = cash_df[cash_df['Company'] == company]
-            company_cash_2024 = company_cash[['Cash Flow Type', '2024']].copy()
-
-            # Sort for logical waterfall order
-            order = ['Operating Cash Flow', 'Investing Cash Flow', 'Financing Cash Flow', 'Net Cash Flow']
-            company_cash_2024['Cash Flow Type'] = pd.Categorical(
-                company_cash_2024['Cash Flow Type'], 
-                categories=order, 
-                ordered=True
+        # Create columns for each company
+        company_cols = st.columns(len(selected_companies))
+
+        for idx, company in enumerate(selected_companies):
+            with company_cols[idx]:
+                st.markdown(
+                    f'<div class="company-header">{company}</div>',
+                    unsafe_allow_html=True
+                    )
+
+                for fig in get_efficiency_gauges(data_version, company, ratio_cube):
+                    st.plotly_chart(fig, use_container_width=True)
+
+if analysis_view == "Structure":
+    with timings.section("tab4_structure"):
+        # Financial Structure Analysis
+        st.subheader("Financial Structure Composition")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("#### Asset Structure (2024)")
+
+            fig_assets = get_analysis_chart('asset_structure', data_version, tuple(selected_companies), company_colors, ratio_cube)
+            if fig_assets is not None:
+                st.plotly_chart(fig_assets, use_container_width=True)
+
+        with col2:
+            st.markdown("#### Financing Structure (2024)")
+
+            fig_financing = get_analysis_chart('financing_structure', data_version, tuple(selected_companies), company_colors, ratio_cube)
+            if fig_financing is not None:
+                st.plotly_chart(fig_financing, use_container_width=True)
+
+if analysis_view == "Comparative Analysis":
+    with timings.section("tab6_comparative"):
+        # Peer clusters and redundant ratios across every company in the dataset
+        st.subheader("Peer Clusters & Redundant Ratios (2024)")
+
+        profile = get_ratio_profile(data_version, "2024", ratio_cube)
+        n_universe = len(profile.companies)
+
+        if n_universe < 3 or len(profile.ratios) < 2:
+            st.info("Peer clustering needs at least 3 companies with comparable 2024 ratios.")
+        else:
+            n_clusters = st.slider(
+                "Number of clusters",
+                min_value=2,
+                max_value=min(12, n_universe),
+                value=min(4, n_universe),
+                key="n_clusters"
             )
-            company_cash_2024 = company_cash_2024.sort_values('Cash Flow Type')
-
-            # Create waterfall
-            fig_waterfall = go.Figure(go.Waterfall(
-                name=f"{company} 2024",
-                orientation="v",
-                measure=["relative", "relative", "relative", "total"],
-                x=company_cash_2024['Cash Flow Type'],
-                y=company_cash_2024['2024'],
-                textposition="outside",
-                connector={"line": {"color": "rgb(63, 63, 63)"}},
-                decreasing={"marker": {"color": "#d62728"}},
-                increasing={"marker": {"color": "#2ca02c"}},
-                totals={"marker": {"color": "#1f77b4"}}
-            ))
-            
-            fig_waterfall.update_layout(
-                title=f"Cash Flow Waterfall - {company} (2024)",
-                showlegend=False,
-                height=400
+            peer_companies = tuple(company for company in selected_companies if company in profile.company_index)
+
+            col1, col2 = st.columns([3, 2])
+
+            with col1:
+                st.plotly_chart(
+                    get_cluster_map(data_version, "2024", n_clusters, peer_companies, company_colors, profile),
+                    use_container_width=True
+                )
+
+            with col2:
+                st.markdown("#### Nearest Peers")
+                if peer_companies:
+                    st.dataframe(
+                        get_peers(data_version, "2024", peer_companies, n_clusters, profile)
+                        .style.format({'distance': "{:.2f}"}),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                st.caption(
+                    f"Distance between standardized 2024 ratios among all {n_universe:,} companies "
+                    f"({len(profile.ratios)} ratios)."
+                )
+
+            _, cluster_profiles = get_clusters(data_version, "2024", n_clusters, profile)
+            st.markdown("#### Cluster Profiles (median ratios)")
+            st.dataframe(
+                cluster_profiles.T.style.format("{:,.2f}"),
+                use_container_width=True
             )
-            
-            st.plotly_chart(fig_waterfall, use_container_width=True)
+
+            st.markdown("#### Redundant Ratios")
+            redundant = get_redundant_ratios(data_version, "2024", profile)
+            if redundant.empty:
+                st.success("No two ratios carry the same information across these companies.")
+            else:
+                st.dataframe(
+                    redundant.style.format({'correlation': "{:.3f}"}),
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+            with st.expander("Correlation matrix"):
+                st.plotly_chart(get_correlation_chart(data_version, "2024", profile), use_container_width=True)
+
+if analysis_view == "All Data":
+    with timings.section("tab5_all_data"):
+        # All Data tab
+        st.subheader("Complete Ratio Data")
+
+        # Filtered and formatted once per selection
+        formatted_df = get_ratio_table(data_version, tuple(selected_companies), selected_category, master_df)
+
+        st.dataframe(
+            formatted_df,
+            use_container_width=True,
+            height=600
+        )
+
+# Row 4: Cash Flow Analysis (using master_inputs)
+with timings.section("cash_flow"):
+    st.header("Cash Flow Analysis")
+
+    if len(selected_companies) > 0:
+        inputs_cube = get_inputs_cube(data_version, master_inputs_df)
+
+        cash_companies = [company for company in selected_companies if company in inputs_cube.company_index]
+
+        if cash_companies:
+            # Create waterfall charts for each company, a page of small multiples at a time
+            st.subheader("Cash Flow Components")
+
+            per_page = 4
+            n_pages = -(-len(cash_companies) // per_page)
+            page = 1
+            if n_pages > 1:
+                page = st.number_input(f"Page (1-{n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+            page_companies = cash_companies[(page - 1) * per_page:page * per_page]
+
+            waterfall_cols = st.columns(2)
+            for idx, company in enumerate(page_companies):
+                with waterfall_cols[idx % 2]:
+                    st.markdown(f"{company}")
+
+                    fig_waterfall = cash_flow_waterfall(inputs_cube, company)
+                    st.plotly_chart(fig_waterfall, use_container_width=True)
 
 # Row 5: Overall Insights
-if show_insights:
-    st.header("Overall Insights & Recommendations")
+with timings.section("insights"):
+    if show_insights:
+        st.header("Overall Insights & Recommendations")
     
-    insights_col1, insights_col2 = st.columns(2)
+        insights_col1, insights_col2 = st.columns(2)
     
-    with insights_col1:
-        st.markdown("### Strengths")
-        strengths = []
+        with insights_col1:
+            st.markdown("### Strengths")
+            strengths = []
         
-        # Check each company for strengths
-        for company in selected_companies:
-            company_data = master_df[master_df['company'] == company]
-            
-            # Check equity ratio
-            equity_ratio = get_ratio_value(company, "Equity Ratio", "2024")
-            if equity_ratio and equity_ratio > 0.5:
-                strengths.append(f"{company}: Strong equity position ({equity_ratio:.1%})")
+            # Check each company for strengths
+            for company in selected_companies:
+                # Check equity ratio
+                equity_ratio = get_ratio_value(company, "Equity Ratio", "2024")
+                if equity_ratio and equity_ratio > 0.5:
+                    strengths.append(f"{company}: Strong equity position ({equity_ratio:.1%})")
             
-            # Check current ratio
-            current_ratio = get_ratio_value(company, "Current Ratio", "2024")
-            if current_ratio and current_ratio > 2.0:
-                strengths.append(f"{company}: Excellent liquidity (Current Ratio: {current_ratio:.2f})")
+                # Check current ratio
+                current_ratio = get_ratio_value(company, "Current Ratio", "2024")
+                if current_ratio and current_ratio > 2.0:
+                    strengths.append(f"{company}: Excellent liquidity (Current Ratio: {current_ratio:.2f})")
             
-            # Check positive interest coverage
-            interest_coverage = get_ratio_value(company, "Interest Coverage Ratio", "2024")
-            if interest_coverage and interest_coverage > 2:
-                strengths.append(f"{company}: Strong interest coverage ({interest_coverage:.2f})")
+                # Check positive interest coverage
+                interest_coverage = get_ratio_value(company, "Interest Coverage Ratio", "2024")
+                if interest_coverage and interest_coverage > 2:
+                    strengths.append(f"{company}: Strong interest coverage ({interest_coverage:.2f})")
         
-        if strengths:
-            for strength in strengths:
-                st.markdown(f'<div class="insight-box">{strength}</div>', unsafe_allow_html=True)
-        else:
-            st.info("No significant strengths identified for selected companies.")
-    
-    with insights_col2:
-        st.markdown("### Areas for Improvement")
-        improvements = []
+            if strengths:
+                for strength in strengths:
+                    st.markdown(f'<div class="insight-box">{strength}</div>', unsafe_allow_html=True)
+            else:
+                st.info("No significant strengths identified for selected companies.")
+    
+        with insights_col2:
+            st.markdown("### Areas for Improvement")
+            improvements = []
         
-        # Check each company for improvements needed
-        for company in selected_companies:
-            company_data = master_df[master_df['company'] == company]
-            
-            # Check negative interest coverage
-            interest_coverage = get_ratio_value(company, "Interest Coverage Ratio", "2024")
-            if interest_coverage and interest_coverage < 0:
-                improvements.append(f"{company}: Negative interest coverage indicates financial distress")
+            # Check each company for improvements needed
+            for company in selected_companies:
+                # Check negative interest coverage
+                interest_coverage = get_ratio_value(company, "Interest Coverage Ratio", "2024")
+                if interest_coverage and interest_coverage < 0:
+                    improvements.append(f"{company}: Negative interest coverage indicates financial distress")
             
-            # Check low cash holdings
-            cash_ratio = get_ratio_value(company, "Cash Holdings Ratio", "2024")
-            if cash_ratio and cash_ratio < 0.05:
-                improvements.append(f"{company}: Low cash reserves ({cash_ratio:.1%})")
+                # Check low cash holdings
+                cash_ratio = get_ratio_value(company, "Cash Holdings Ratio", "2024")
+                if cash_ratio and cash_ratio < 0.05:
+                    improvements.append(f"{company}: Low cash reserves ({cash_ratio:.1%})")
             
-            # Check negative margins
-            net_margin = get_ratio_value(company, "Net Profit Margin", "2024")
-            if net_margin and net_margin < 0:
-                improvements.append(f"{company}: Operating at a loss ({net_margin:.1%} net margin)")
+                # Check negative margins
+                net_margin = get_ratio_value(company, "Net Profit Margin", "2024")
+                if net_margin and net_margin < 0:
+                    improvements.append(f"{company}: Operating at a loss ({net_margin:.1%} net margin)")
         
-        if improvements:
-            for improvement in improvements:
-                st.markdown(f'<div class="warning-box">{improvement}</div>', unsafe_allow_html=True)
-        else:
-            st.success("No critical issues identified for selected companies.")
+            if improvements:
+                for improvement in improvements:
+                    st.markdown(f'<div class="warning-box">{improvement}</div>', unsafe_allow_html=True)
+            else:
+                st.success("No critical issues identified for selected companies.")
 
 # Row 6: Raw Data (if requested)
-if show_raw_data:
-    with st.expander("📄 Raw Data Preview"):
-        col1, col2 = st.columns(2)
+with timings.section("raw_data"):
+    if show_raw_data:
+        with st.expander("📄 Raw Data Preview"):
+            col1, col2 = st.columns(2)
         
-        with col1:
-            st.write("### Master Ratios Data")
-            st.dataframe(master_df.head(30))
+            with col1:
+                st.write("### Master Ratios Data")
+                st.dataframe(master_df.head(30))
         
-        with col2:
-            st.write("### Master Inputs Data")
-            st.dataframe(master_inputs_df.head(30))
+            with col2:
+                st.write("### Master Inputs Data")
+                st.dataframe(master_inputs_df.head(30))
 
 # Footer
 st.markdown("---")
@@ -971,13 +869,46 @@ st.markdown("*Dashboard created with Streamlit & Plotly | Data updated: 2024*")
 st.markdown("By Princely Hezekiel Kitilya.")
 
 # Add download button for filtered data
-if len(selected_companies) > 0:
-    filtered_data = master_df[master_df['company'].isin(selected_companies)]
-    csv = filtered_data.to_csv(index=False)
-    
-    st.sidebar.download_button(
-        label="Download Filtered Data",
-        data=csv,
-        file_name=f"financial_ratios_{'_'.join(selected_companies)}.csv",
-        mime="text/csv"
-    )
\ No newline at end of file
+with timings.section("csv_export"):
+    if len(selected_companies) > 0:
+        filtered_data = master_df[master_df['company'].isin(selected_companies)]
+        csv = filtered_data.to_csv(index=False)
+    
+        st.sidebar.download_button(
+            label="Download Filtered Data",
+            data=csv,
+            file_name=f"financial_ratios_{'_'.join(selected_companies)}.csv",
+            mime="text/csv"
+        )
+
+# Wall and CPU time of this rerun (CPU of the script thread only, so per session)
+rerun_wall = time.perf_counter() - rerun_start
+rerun_cpu = time.thread_time() - rerun_cpu_start
+timings.record("rerun_total", rerun_wall)
+timings.record("rerun_cpu", rerun_cpu)
+st.session_state["last_rerun"] = {'wall_s': rerun_wall, 'cpu_s': rerun_cpu}
+
+# Performance panel (admin/debug only: open the app with ?debug=1)
+if st.query_params.get("debug") == "1":
+    with st.expander("⏱️ Performance", expanded=True):
+        perf_summary = timings.summary()
+        st.caption("Timings from every session on this server (latest runs, milliseconds)")
+        st.dataframe(
+            perf_summary.round(2),
+            use_container_width=True,
+            hide_index=True
+        )
+        if not perf_summary.empty:
+            st.plotly_chart(section_timing_chart(perf_summary), use_container_width=True)
+
+        perf_col1, perf_col2 = st.columns(2)
+        with perf_col1:
+            st.download_button(
+                label="Download timings (JSON lines)",
+                data=timings.to_jsonl(),
+                file_name="dashboard_timings.jsonl",
+                mime="application/json"
+            )
+        with perf_col2:
+            if st.button("Clear timings"):
+                timings.clear()
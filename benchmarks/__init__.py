@@ -0,0 +1 @@
+"""Performance benchmarks on synthetic data."""
@@ -0,0 +1,269 @@
+"""Concurrent-session load test of the dashboard.
+
+Every simulated analyst is a headless AppTest session on its own thread in
+this process, so sessions share the module-level caches, the timing buffer
+and the GIL exactly like sessions of one `streamlit run` server. Each session
+loads the dashboard and then clicks through random company, year, category
+and color scheme changes.
+
+    python -m benchmarks.loadtest --sessions 1 5 10 --actions 20
+    python -m benchmarks.loadtest --sessions 10 --scale 1000 --output load.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks import synthetic
+from benchmarks.run import APP_PATH, environment
+from pipeline.master import build_master
+
+ACTIONS = ['companies', 'years', 'category', 'color_scheme']
+
+
+def rss_mb():
+    """Current resident set size of this process (MB)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (MB; ru_maxrss is bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def random_action(at, rng):
+    """Apply one random sidebar change to a session; returns the action name"""
+    action = rng.choice(ACTIONS)
+    sidebar = at.sidebar
+
+    if action == 'companies':
+        widget = sidebar.multiselect[0]
+        widget.set_value(rng.sample(widget.options, rng.randint(1, len(widget.options))))
+    elif action == 'years':
+        widget = sidebar.multiselect[1]
+        widget.set_value(rng.sample(widget.options, rng.randint(1, len(widget.options))))
+    elif action == 'category':
+        widget = sidebar.selectbox[0]
+        widget.select(rng.choice(widget.options))
+    else:
+        widget = sidebar.selectbox[1]
+        widget.select(rng.choice(widget.options))
+    return action
+
+
+def share_server_state():
+    """
+    Make AppTest behave like one server for sessions on threads.
+
+    AppTest installs a mock Runtime for each run and clears it when the run
+    ends, so one session's teardown would pull the runtime from under another
+    session's script ("Runtime hasn't been created!"); fall back to the last
+    runtime installed, as a server has one for all sessions. AppTest also
+    compiles the script again on every run, and concurrent compiles hit a
+    CPython 3.11 parser bug ("AST constructor recursion depth mismatch"); a
+    server compiles once, so compiles are serialized here.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    if getattr(Runtime, '_loadtest_shared', False):
+        return
+    original_instance = Runtime.instance.__func__
+    original_get_bytecode = ScriptCache.get_bytecode
+    last = []
+    compile_lock = threading.Lock()
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+            return cls._instance
+        return last[0] if last else original_instance(cls)
+
+    def get_bytecode(self, script_path):
+        with compile_lock:
+            return original_get_bytecode(self, script_path)
+
+    Runtime.instance = classmethod(instance)
+    ScriptCache.get_bytecode = get_bytecode
+    Runtime._loadtest_shared = True
+
+
+def run_session(session_id, n_actions, think_time, seed, timeout, samples, errors, start_barrier):
+    """One simulated analyst: initial load, then n_actions random reruns; failures go to `errors`"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_id)
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    except Exception as e:
+        errors.append({'session': session_id, 'action': 'setup', 'error': repr(e)})
+        # Release the sessions already waiting instead of leaving them on the barrier
+        start_barrier.abort()
+        return
+
+    try:
+        start_barrier.wait()
+    except threading.BrokenBarrierError:
+        errors.append({'session': session_id, 'action': 'setup', 'error': "another session failed to start"})
+        return
+
+    action = 'initial_load'
+    try:
+        for step in range(n_actions + 1):
+            if step:
+                time.sleep(think_time * rng.random())
+                action = random_action(at, rng)
+
+            start = time.perf_counter()
+            at.run()
+            latency = time.perf_counter() - start
+
+            if at.exception:
+                errors.append({'session': session_id, 'action': action, 'error': at.exception[0].value})
+                return
+            if not at.main.children and not at.sidebar.children:
+                # Nothing rendered and no exception element: the script failed to compile
+                # (Streamlit only logs "Script compilation error")
+                errors.append({'session': session_id, 'action': action, 'error': "rerun rendered an empty page"})
+                return
+
+            rerun = at.session_state['last_rerun'] if 'last_rerun' in at.session_state else {}
+            # list.append is atomic: no lock needed across session threads
+            samples.append({
+                'session': session_id,
+                'action': action,
+                'latency_s': latency,
+                'script_s': rerun.get('wall_s'),
+                'cpu_s': rerun.get('cpu_s'),
+            })
+    except Exception as e:
+        # Widget lookups in random_action fail too when a rerun left the page incomplete
+        errors.append({'session': session_id, 'action': action, 'error': repr(e)})
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=float)
+    return {
+        'n': int(values.size),
+        'mean_s': float(values.mean()),
+        'p50_s': float(np.percentile(values, 50)),
+        'p90_s': float(np.percentile(values, 90)),
+        'p95_s': float(np.percentile(values, 95)),
+        'p99_s': float(np.percentile(values, 99)),
+        'max_s': float(values.max()),
+    }
+
+
+def run_load(n_sessions, n_actions, think_time, seed, timeout):
+    """N concurrent sessions; returns one result record"""
+    share_server_state()
+    samples, errors = [], []
+    barrier = threading.Barrier(n_sessions)
+    rss_before = rss_mb()
+    cpu_before = time.process_time()
+
+    threads = [
+        threading.Thread(target=run_session, name=f"session-{i}",
+                         args=(i, n_actions, think_time, seed, timeout, samples, errors, barrier))
+        for i in range(n_sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    rss_after = rss_mb()
+    record = {
+        'sessions': n_sessions,
+        'actions_per_session': n_actions,
+        'think_time_s': think_time,
+        'elapsed_s': elapsed,
+        'reruns': len(samples),
+        'throughput_reruns_per_s': len(samples) / elapsed if elapsed else None,
+        'process_cpu_s': time.process_time() - cpu_before,
+        'rss_before_mb': rss_before,
+        'rss_after_mb': rss_after,
+        'rss_per_session_mb': (rss_after - rss_before) / n_sessions,
+        'peak_rss_mb': peak_rss_mb(),
+        'errors': errors,
+    }
+    if samples:
+        record['latency'] = percentiles([s['latency_s'] for s in samples])
+        record['latency_by_action'] = {
+            action: percentiles([s['latency_s'] for s in samples if s['action'] == action])
+            for action in sorted({s['action'] for s in samples})
+        }
+        cpu = [s['cpu_s'] for s in samples if s['cpu_s'] is not None]
+        if cpu:
+            record['cpu_per_rerun'] = percentiles(cpu)
+            per_session = [sum(s['cpu_s'] or 0 for s in samples if s['session'] == i) for i in range(n_sessions)]
+            record['cpu_per_session_s'] = {'mean': float(np.mean(per_session)), 'max': float(np.max(per_session))}
+    return record
+
+
+def write_synthetic_data(folder, companies, seed):
+    """Master tables for `companies` synthetic companies"""
+    build_master([synthetic.make_master_ratios(companies, seed)]).to_excel(
+        os.path.join(folder, "master_ratios.xlsx"), index=False)
+    build_master([synthetic.make_master_inputs(companies, seed)]).to_excel(
+        os.path.join(folder, "master_inputs.xlsx"), index=False)
+
+
+def format_record(record):
+    if 'latency' not in record:
+        return f"{record['sessions']:>4} sessions  no successful reruns ({len(record['errors'])} errors)"
+    latency = record['latency']
+    return (f"{record['sessions']:>4} sessions  {record['reruns']:>5} reruns  "
+            f"p50 {latency['p50_s'] * 1000:8.1f}ms  p95 {latency['p95_s'] * 1000:8.1f}ms  "
+            f"p99 {latency['p99_s'] * 1000:8.1f}ms  {record['throughput_reruns_per_s']:6.2f} reruns/s  "
+            f"cpu/session {record.get('cpu_per_session_s', {}).get('mean', float('nan')):6.2f}s  "
+            f"rss {record['rss_after_mb']:7.1f}MB  errors {len(record['errors'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10],
+                        help="concurrent session counts to run, one after another")
+    parser.add_argument("--actions", type=int, default=20, help="random sidebar changes per session")
+    parser.add_argument("--think-time", type=float, default=0.5,
+                        help="maximum pause between a session's actions (seconds, uniform)")
+    parser.add_argument("--scale", type=int, help="use this many synthetic companies instead of ./pipeline")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds before a single rerun counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest_results.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        if args.scale:
+            write_synthetic_data(folder, args.scale, args.seed)
+            os.environ["RATIOS_DATA_DIR"] = folder
+
+        results = []
+        for n_sessions in args.sessions:
+            record = run_load(n_sessions, args.actions, args.think_time, args.seed, args.timeout)
+            print(format_record(record), flush=True)
+            results.append(record)
+
+    config = {k: v for k, v in vars(args).items() if k != 'output'}
+    with open(args.output, "w") as f:
+        json.dump({'environment': environment(), 'config': config, 'results': results}, f, indent=2)
+    print(f"\nSaved {args.output}")
+    return 1 if any(record['errors'] for record in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
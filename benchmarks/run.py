@@ -0,0 +1,279 @@
+"""Benchmark suite for ingestion, ratio computation, consolidation, data loading,
+dashboard cold starts and headless dashboard reruns on synthetic data.
+
+    python -m benchmarks.run --scales 10 1000 10000 --output bench.json
+    python -m benchmarks.run --scales 10 --compare bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from pipeline.extract import extract_financial_inputs
+from pipeline.master import build_master, load_master_frames
+from pipeline.ratios import statement_from_sheet, compute_company_ratios
+from pipeline.snapshot import load_master_snapshot
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app2.py")
+
+
+def summarize(name, companies, timings, **extra):
+    """One result record from a list of per-call timings (seconds)"""
+    timings = np.asarray(timings, dtype=float)
+    return {
+        'benchmark': name,
+        'companies': companies,
+        'n': int(timings.size),
+        'total_s': float(timings.sum()),
+        'mean_s': float(timings.mean()),
+        'p50_s': float(np.percentile(timings, 50)),
+        'p95_s': float(np.percentile(timings, 95)),
+        'min_s': float(timings.min()),
+        **extra,
+    }
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def bench_extract(folder, companies, max_workbooks):
+    """extract_financial_inputs on real .xlsx files (a capped sample at large scales)"""
+    paths = synthetic.write_yc_workbooks(os.path.join(folder, "statements"), min(companies, max_workbooks))
+    timings = [timed(extract_financial_inputs, path)[0] for path in paths]
+    return summarize('extract_financial_inputs', companies, timings,
+                     per_workbook=True, sampled_workbooks=len(paths))
+
+
+def bench_ratios(companies, seed):
+    """Every ratio function for every company, on in-memory statements"""
+    rng = np.random.default_rng(seed)
+    statements = [statement_from_sheet(synthetic.make_yc_sheet(rng)) for _ in range(companies)]
+    names = synthetic.company_names(companies)
+
+    timings = [timed(compute_company_ratios, statement, name)[0] for statement, name in zip(statements, names)]
+    return summarize('compute_company_ratios', companies, timings, per_company=True)
+
+
+def bench_consolidation(folder, companies, seed):
+    """master.ipynb: concatenate per-company tables and write the master workbooks"""
+    ratio_frames = synthetic.split_by_company(synthetic.make_master_ratios(companies, seed))
+    input_frames = synthetic.split_by_company(synthetic.make_master_inputs(companies, seed))
+
+    concat_time, master_df = timed(build_master, ratio_frames)
+    _, master_inputs_df = timed(build_master, input_frames)
+
+    write_time, _ = timed(master_df.to_excel, os.path.join(folder, "master_ratios.xlsx"), index=False)
+    master_inputs_df.to_excel(os.path.join(folder, "master_inputs.xlsx"), index=False)
+
+    return [
+        summarize('build_master', companies, [concat_time]),
+        summarize('write_master_ratios', companies, [write_time]),
+    ]
+
+
+def bench_load(folder, companies, repeat):
+    """load_and_clean_data body: read both master workbooks and clean them"""
+    timings = [timed(load_master_frames, folder)[0] for _ in range(repeat)]
+    return summarize('load_and_clean_data', companies, timings)
+
+
+def run_app(data_dir, queue, cache_dir, spawned_at, first_run_only=False):
+    """Child process: headless dashboard runs against the synthetic master tables"""
+    os.environ["RATIOS_DATA_DIR"] = data_dir
+    os.environ["RATIOS_CACHE_DIR"] = cache_dir
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=3600)
+    results = {}
+
+    results['app_cold_run'] = timed(at.run)[0]
+    # Process spawn (interpreter start, imports) to the first complete page
+    results['app_cold_start'] = time.time() - spawned_at
+    if first_run_only:
+        if at.exception:
+            results['error'] = str(at.exception[0].value)
+        queue.put(results)
+        return
+
+    results['app_warm_rerun'] = timed(at.run)[0]
+
+    category = at.sidebar.selectbox[0]
+    results['app_category_change'] = timed(category.select(category.options[-1]).run)[0]
+
+    color_scheme = at.sidebar.selectbox[1]
+    results['app_color_scheme_change'] = timed(color_scheme.select(color_scheme.options[1]).run)[0]
+
+    if at.exception:
+        results['error'] = str(at.exception[0].value)
+
+    # Per-section timings recorded by the dashboard's own instrumentation
+    from instrumentation import timings
+    results['sections'] = timings.summary().to_dict('records')
+    queue.put(results)
+
+
+def spawn_app(folder, cache_dir, timeout, first_run_only=False):
+    """run_app in a fresh spawned process; its results, or 'timeout' / 'failed'"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=run_app, args=(folder, queue, cache_dir, time.time(), first_run_only))
+    process.start()
+    process.join(timeout)
+
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return 'timeout'
+    if queue.empty():
+        return 'failed'
+    return queue.get()
+
+
+def bench_app(folder, companies, timeout):
+    """Full app2.py script runs in a fresh process (cold caches, no snapshot), killed after `timeout`"""
+    results = spawn_app(folder, os.path.join(folder, "cache_cold"), timeout)
+    if isinstance(results, str):
+        return [{'benchmark': 'app_cold_run', 'companies': companies, 'status': results, 'timeout_s': timeout}]
+
+    error = results.pop('error', None)
+    sections = results.pop('sections', [])
+
+    records = [summarize(name, companies, [seconds]) for name, seconds in results.items()]
+    if error:
+        for record in records:
+            record['error'] = error
+    for section in sections:
+        records.append({
+            'benchmark': f"app_section.{section['section']}",
+            'companies': companies,
+            'n': int(section['count']),
+            'mean_s': section['mean_ms'] / 1000,
+            'p50_s': section['p50_ms'] / 1000,
+            'p95_s': section['p95_ms'] / 1000,
+            'total_s': section['mean_ms'] * section['count'] / 1000,
+            'min_s': None,
+        })
+    return records
+
+
+def bench_cold_start_snapshot(folder, companies, timeout):
+    """Spawn to first page of a fresh process after `python -m pipeline.snapshot` pre-warmed the cache"""
+    cache_dir = os.path.join(folder, "cache_warm")
+    load_master_snapshot(folder, cache_dir)
+
+    results = spawn_app(folder, cache_dir, timeout, first_run_only=True)
+    if isinstance(results, str):
+        return {'benchmark': 'app_cold_start_snapshot', 'companies': companies, 'status': results, 'timeout_s': timeout}
+    record = summarize('app_cold_start_snapshot', companies, [results['app_cold_start']])
+    if 'error' in results:
+        record['error'] = results['error']
+    return record
+
+
+def run_suite(scales, max_workbooks, repeat, app_timeout, skip_app, seed):
+    results = []
+    for companies in scales:
+        print(f"--- {companies} companies", flush=True)
+        with tempfile.TemporaryDirectory() as folder:
+            scale_results = [
+                bench_extract(folder, companies, max_workbooks),
+                bench_ratios(companies, seed),
+                *bench_consolidation(folder, companies, seed),
+                bench_load(folder, companies, repeat),
+            ]
+            if not skip_app:
+                scale_results.extend(bench_app(folder, companies, app_timeout))
+                scale_results.append(bench_cold_start_snapshot(folder, companies, app_timeout))
+
+        for record in scale_results:
+            print(format_record(record), flush=True)
+        results.extend(scale_results)
+    return results
+
+
+def format_record(record):
+    if 'mean_s' not in record:
+        return f"{record['benchmark']:<36} {record['companies']:>7}  {record.get('status')}"
+    return (f"{record['benchmark']:<36} {record['companies']:>7}  "
+            f"total {record['total_s']:9.3f}s  mean {record['mean_s'] * 1000:9.2f}ms  "
+            f"p95 {record['p95_s'] * 1000:9.2f}ms")
+
+
+def environment():
+    import streamlit
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'streamlit': streamlit.__version__,
+    }
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, baseline_path, tolerance):
+    """Print mean-time ratios against a previous results file; returns the regressions"""
+    previous = {(r['benchmark'], r['companies']): r for r in baseline['results'] if 'mean_s' in r}
+
+    regressions = []
+    print(f"\n--- compared with {baseline_path} (tolerance x{tolerance})")
+    for record in results:
+        old = previous.get((record['benchmark'], record['companies']))
+        if old is None or 'mean_s' not in record:
+            continue
+        ratio = record['mean_s'] / old['mean_s'] if old['mean_s'] else float('inf')
+        flag = "REGRESSION" if ratio > tolerance else ""
+        print(f"{record['benchmark']:<36} {record['companies']:>7}  x{ratio:6.2f}  {flag}")
+        if flag:
+            regressions.append(record)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 1000, 10000],
+                        help="numbers of synthetic companies")
+    parser.add_argument("--max-workbooks", type=int, default=25,
+                        help="workbooks actually written and parsed per scale (extraction is per file)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions of the load benchmark")
+    parser.add_argument("--app-timeout", type=float, default=600, help="seconds before a headless app run is abandoned")
+    parser.add_argument("--skip-app", action="store_true", help="skip the headless app2.py runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json", help="machine-readable results file")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="mean-time ratio above which a benchmark counts as a regression")
+    args = parser.parse_args(argv)
+
+    # Read the baseline before anything is written: --output may name the same file
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    results = run_suite(args.scales, args.max_workbooks, args.repeat, args.app_timeout, args.skip_app, args.seed)
+    regressions = compare(results, baseline, args.compare, args.tolerance) if baseline else []
+
+    with open(args.output, "w") as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"\nSaved {args.output}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
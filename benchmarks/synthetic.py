@@ -0,0 +1,160 @@
+"""Synthetic data shaped like the real inputs: 'YC' statement sheets and the
+master_ratios / master_inputs tables, at any number of companies."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline.extract import HEADER_ROWS, standardize_dict
+
+YEAR_COLUMNS = ['01.22-12.22', '01.23-12.23', '01.24-12.24']
+
+# Ratio layout of master_ratios.xlsx: (category, ratio_name, low, high)
+RATIO_LAYOUT = [
+    ('leverage', 'Debt to Equity Ratio', 0.1, 2.5),
+    ('leverage', 'Equity to Fixed Assets Ratio', 0.5, 2.5),
+    ('leverage', 'Interest Coverage Ratio', -4.0, 8.0),
+    ('leverage', 'Equity Financial Leverage (EFL)', -0.05, 0.15),
+    ('liquidity', 'Current Ratio', 0.6, 3.5),
+    ('liquidity', 'Quick Ratio', 0.4, 3.0),
+    ('liquidity', 'Cash Holdings Ratio', 0.0, 0.2),
+    ('liquidity', 'Working Capital', -50000.0, 400000.0),
+    ('activity', 'Asset Turnover Ratio', 0.3, 2.0),
+    ('activity', 'Days to Sell Inventory', 20, 380),
+    ('activity', 'Days Sales Outstanding', 20, 120),
+    ('activity', 'Days Payable Outstanding', 20, 120),
+    ('profitability', 'Non-current Assets Ratio', 0.2, 0.8),
+    ('profitability', 'Current Assets Ratio', 0.2, 0.8),
+    ('profitability', 'Equity Ratio', 0.2, 0.9),
+    ('profitability', 'Non-current Liabilities Ratio', 0.0, 0.3),
+    ('profitability', 'Current Liabilities Ratio', 0.1, 0.5),
+    ('profitability', 'Gross Margin', 0.0, 0.45),
+    ('profitability', 'Operating Margin', -0.05, 0.2),
+    ('profitability', 'EBIT Margin', -0.05, 0.15),
+    ('profitability', 'Net Profit Margin', -0.05, 0.12),
+]
+
+# Standardized items of master_inputs.xlsx (alphabetical, like the saved workbooks)
+INPUT_ITEMS = sorted(set(standardize_dict.values()))
+
+
+def company_names(n_companies):
+    return [f"CO{i:05d}" for i in range(n_companies)]
+
+
+def statement_values(rng):
+    """One consistent set of statement values for a single year (thousands)"""
+    total_assets = rng.uniform(5e4, 5e6)
+    non_current_assets = total_assets * rng.uniform(0.3, 0.7)
+    current_assets = total_assets - non_current_assets
+    equity = total_assets * rng.uniform(0.3, 0.8)
+    non_current_liabilities = (total_assets - equity) * rng.uniform(0.1, 0.5)
+    current_liabilities = total_assets - equity - non_current_liabilities
+    revenue = total_assets * rng.uniform(0.4, 1.6)
+    gross_profit = revenue * rng.uniform(0.05, 0.4)
+    operating_profit = gross_profit * rng.uniform(-0.2, 0.6)
+    financial_expenses = -revenue * rng.uniform(0.0, 0.05)
+    profit_before_tax = operating_profit + financial_expenses
+    net_profit = profit_before_tax * 0.81
+    operating_cash_flow = operating_profit * rng.uniform(0.5, 1.5)
+    investing_cash_flow = -revenue * rng.uniform(0.0, 0.08)
+    financing_cash_flow = revenue * rng.uniform(-0.08, 0.04)
+
+    return {
+        'ASSETS': total_assets,
+        'Non-current assets': non_current_assets,
+        'Current assets': current_assets,
+        'Inventories': current_assets * rng.uniform(0.1, 0.6),
+        'Trade receivables': current_assets * rng.uniform(0.1, 0.4),
+        'Cash and cash equivalents': current_assets * rng.uniform(0.02, 0.2),
+        'EQUITY & LIABILITIES': total_assets,
+        'Equity shareholders of the parent': equity,
+        'Non-current liabilities': non_current_liabilities,
+        'Current liabilities': current_liabilities,
+        'Trade payables': current_liabilities * rng.uniform(0.2, 0.7),
+        'Revenues from sales': revenue,
+        'Gross profit/loss on sales': gross_profit,
+        'Operating profit/loss': operating_profit,
+        'Financial expenses': financial_expenses,
+        'Profit/loss before tax': profit_before_tax,
+        'Net profit/loss': net_profit,
+        'Depreciation': total_assets * rng.uniform(0.01, 0.05),
+        'Cash flow from operating activities': operating_cash_flow,
+        'Cash flow from investing activities': investing_cash_flow,
+        'Cash flow from financing activities': financing_cash_flow,
+        'Net cash flow': operating_cash_flow + investing_cash_flow + financing_cash_flow,
+    }
+
+
+def make_yc_sheet(rng, filler_rows=260):
+    """
+    A raw 'YC' sheet: a summary block of HEADER_ROWS rows, then statement lines
+    interleaved with unmapped filler lines so the sheet has a realistic size.
+    """
+    years = [statement_values(rng) for _ in YEAR_COLUMNS]
+    labels = list(years[0])
+
+    header = [f"Summary line {i}" for i in range(HEADER_ROWS)]
+    body = labels + [f"Other item {i}" for i in range(filler_rows)]
+    order = rng.permutation(len(body))
+    body = [body[i] for i in order]
+
+    rows = header + body
+    data = {
+        'D_0': np.arange(len(rows)),
+        'Okres obrachunkowy': rows,
+        'Accounting period': rows,
+        'Unnamed: 3': np.nan,
+    }
+    for column, values in zip(YEAR_COLUMNS, years):
+        data[column] = [values.get(label, rng.uniform(-1e4, 1e4)) for label in rows]
+    return pd.DataFrame(data)
+
+
+def write_yc_workbooks(folder, n_workbooks, seed=0):
+    """Write n synthetic statement workbooks; returns their paths"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+
+    paths = []
+    for company in company_names(n_workbooks):
+        path = os.path.join(folder, f"{company}.xlsx")
+        make_yc_sheet(rng).to_excel(path, sheet_name='YC', index=False)
+        paths.append(path)
+    return paths
+
+
+def make_master_ratios(n_companies, seed=0):
+    """A master_ratios-shaped table (company | category | ratio_name | 2023 | 2024)"""
+    rng = np.random.default_rng(seed)
+    n_ratios = len(RATIO_LAYOUT)
+    low = np.array([layout[2] for layout in RATIO_LAYOUT], dtype=float)
+    high = np.array([layout[3] for layout in RATIO_LAYOUT], dtype=float)
+
+    values = rng.uniform(low, high, size=(n_companies, 2, n_ratios))
+    return pd.DataFrame({
+        'company': np.repeat(company_names(n_companies), n_ratios),
+        'category': [layout[0] for layout in RATIO_LAYOUT] * n_companies,
+        'ratio_name': [layout[1] for layout in RATIO_LAYOUT] * n_companies,
+        '2023': values[:, 0, :].ravel(),
+        '2024': values[:, 1, :].ravel(),
+    })
+
+
+def make_master_inputs(n_companies, seed=0):
+    """A master_inputs-shaped table (item | 2023 | 2024 | company)"""
+    rng = np.random.default_rng(seed + 1)
+    n_items = len(INPUT_ITEMS)
+
+    values = rng.uniform(-1e5, 5e6, size=(n_companies, 2, n_items))
+    return pd.DataFrame({
+        'item': INPUT_ITEMS * n_companies,
+        '2023': values[:, 0, :].ravel(),
+        '2024': values[:, 1, :].ravel(),
+        'company': np.repeat(company_names(n_companies), n_items),
+    })
+
+
+def split_by_company(master_df):
+    """Per-company frames, as the notebooks produce before consolidation"""
+    return [frame for _, frame in master_df.groupby('company', sort=False)]
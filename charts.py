@@ -0,0 +1,423 @@
+"""Chart definitions shared by the dashboard and the static reports.
+
+Every builder returns a Plotly figure, or None when none of the companies has
+the data the chart needs. Plotly is imported inside the builders: plotly.express
+is slow to import, and deferring it lets a cold dashboard show its first
+sections before any chart is built.
+"""
+import pandas as pd
+
+COLOR_SCHEMES = {
+    "Corporate": {'BORYSZEW': '#1f77b4', 'FASING': '#ff7f0e', 'FEERUM': '#2ca02c'},
+    "Bright": {'BORYSZEW': '#e41a1c', 'FASING': '#377eb8', 'FEERUM': '#4daf4a'},
+    "Pastel": {'BORYSZEW': '#a6cee3', 'FASING': '#b2df8a', 'FEERUM': '#fb9a99'},
+    "Monochrome": {'BORYSZEW': '#636363', 'FASING': '#969696', 'FEERUM': '#cccccc'},
+}
+
+PROFITABILITY_RATIOS = ["Gross Margin", "Operating Margin", "EBIT Margin", "Net Profit Margin"]
+
+# (ratio, gauge title, unit)
+EFFICIENCY_RATIOS = [
+    ("Days Sales Outstanding", "DSO", "days"),
+    ("Days to Sell Inventory", "Inventory Days", "days"),
+    ("Days Payable Outstanding", "DPO", "days"),
+    ("Asset Turnover Ratio", "Asset Turnover", "ratio"),
+    ("Cash Conversion Cycle", "Cash Cycle", "days")
+]
+
+# Cash flow items in waterfall order
+CASH_FLOW_ITEMS = ['operating_cash_flow', 'investing_cash_flow', 'financing_cash_flow', 'net_cash_flow']
+CASH_FLOW_LABELS = [item.replace('_', ' ').title() for item in CASH_FLOW_ITEMS]
+
+
+def company_color_map(scheme, companies):
+    """Colors of the scheme; companies outside it get colors from the Plotly palette"""
+    from plotly.colors import qualitative
+
+    company_colors = dict(COLOR_SCHEMES.get(scheme, COLOR_SCHEMES["Monochrome"]))
+    extra_colors = qualitative.Plotly
+    for i, company in enumerate(c for c in companies if c not in company_colors):
+        company_colors[company] = extra_colors[i % len(extra_colors)]
+    return company_colors
+
+
+def profitability_chart(ratio_cube, companies, company_colors, years=('2024', '2023')):
+    """Margins per company, one facet per year"""
+    import plotly.express as px
+
+    profit_data = []
+    for company in companies:
+        for ratio in PROFITABILITY_RATIOS:
+            for year in years:
+                value = ratio_cube.value(company, ratio, year)
+                if value is not None:
+                    profit_data.append({
+                        'Company': company,
+                        'Ratio': ratio,
+                        'Year': year,
+                        'Value': value,
+                        'Color': company_colors[company]
+                    })
+
+    if not profit_data:
+        return None
+
+    # Create grouped bar chart
+    fig = px.bar(
+        pd.DataFrame(profit_data),
+        x='Ratio',
+        y='Value',
+        color='Company',
+        facet_col='Year',
+        barmode='group',
+        color_discrete_map=company_colors,
+        title="Profitability Margins Comparison"
+    )
+    fig.update_yaxes(tickformat=".1%")
+    fig.update_layout(height=500, showlegend=True)
+    return fig
+
+
+def liquidity_chart(ratio_cube, companies, company_colors, year='2024'):
+    """Current vs quick ratio scatter with the reference quadrants"""
+    import plotly.express as px
+
+    liquidity_data = []
+    for company in companies:
+        cr = ratio_cube.value(company, "Current Ratio", year)
+        qr = ratio_cube.value(company, "Quick Ratio", year)
+
+        if cr and qr:
+            liquidity_data.append({
+                'Company': company,
+                'Current Ratio': cr,
+                'Quick Ratio': qr
+            })
+
+    if not liquidity_data:
+        return None
+
+    liquidity_df = pd.DataFrame(liquidity_data)
+    fig = px.scatter(
+        liquidity_df,
+        x='Current Ratio',
+        y='Quick Ratio',
+        color='Company',
+        size=[100] * len(liquidity_df),
+        hover_name='Company',
+        color_discrete_map=company_colors,
+        title=f"Current vs Quick Ratio ({year})"
+    )
+
+    # Add reference lines
+    fig.add_hline(y=1, line_dash="dash", line_color="gray")
+    fig.add_vline(x=1.5, line_dash="dash", line_color="gray")
+
+    # Add quadrant labels
+    fig.add_annotation(x=0.5, y=2, text="High Quality Liquidity", showarrow=False)
+    fig.add_annotation(x=2.5, y=0.5, text="Inventory Dependent", showarrow=False)
+
+    fig.update_layout(height=400)
+    return fig
+
+
+def leverage_chart(ratio_cube, companies, company_colors, year='2024'):
+    """Debt to equity and equity ratio bars per company"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for company in companies:
+        dte = ratio_cube.value(company, "Debt to Equity Ratio", year)
+        eq_ratio = ratio_cube.value(company, "Equity Ratio", year)
+
+        if dte and eq_ratio:
+            fig.add_trace(go.Bar(
+                name=company,
+                x=['Debt/Equity', 'Equity Ratio'],
+                y=[dte, eq_ratio],
+                marker_color=company_colors[company]
+            ))
+
+    if not fig.data:
+        return None
+
+    fig.update_layout(
+        title=f"Leverage Analysis ({year})",
+        barmode='group',
+        height=400,
+        yaxis_tickformat=".2f"
+    )
+    return fig
+
+
+def efficiency_gauge(title, unit, value, reference):
+    """Gauge of one efficiency metric; delta against the previous year's value"""
+    import plotly.graph_objects as go
+
+    # Determine gauge settings based on metric type
+    if unit == "days":
+        gauge_max = max(150, value * 1.5)
+        ranges = [
+            {'range': [0, 30], 'color': "lightgreen"},
+            {'range': [30, 60], 'color': "yellow"},
+            {'range': [60, gauge_max], 'color': "red"}
+        ]
+    else:
+        gauge_max = max(2.0, value * 1.5)
+        ranges = [
+            {'range': [0, 0.5], 'color': "red"},
+            {'range': [0.5, 1.0], 'color': "yellow"},
+            {'range': [1.0, gauge_max], 'color': "lightgreen"}
+        ]
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=value,
+        title={'text': f"{title}", 'font': {'size': 14}},
+        delta={'reference': reference if reference else 0,
+               'increasing': {'color': "red"},
+               'decreasing': {'color': "green"}},
+        gauge={
+            'axis': {'range': [0, gauge_max]},
+            'steps': ranges,
+            'threshold': {
+                'line': {'color': "black", 'width': 3},
+                'thickness': 0.8,
+                'value': value
+            }
+        }
+    ))
+    fig.update_layout(width=300, height=200, margin=dict(t=50, b=10, l=10, r=10))
+    return fig
+
+
+def efficiency_gauges(ratio_cube, company, year='2024', previous_year='2023'):
+    """Gauges of every efficiency metric the company reports for `year`"""
+    gauges = []
+    for ratio_fullname, short_name, unit in EFFICIENCY_RATIOS:
+        value = ratio_cube.value(company, ratio_fullname, year)
+        if value is None:
+            continue
+        gauges.append(efficiency_gauge(short_name, unit, value, ratio_cube.value(company, ratio_fullname, previous_year)))
+    return gauges
+
+
+def asset_structure_chart(ratio_cube, companies, year='2024'):
+    """Non-current vs current assets share, stacked per company"""
+    import plotly.express as px
+
+    asset_data = []
+    for company in companies:
+        nc_assets = ratio_cube.value(company, "Non-current Assets Ratio", year)
+        c_assets = ratio_cube.value(company, "Current Assets Ratio", year)
+
+        if nc_assets and c_assets:
+            asset_data.append({'Company': company, 'Type': 'Non-current Assets', 'Value': nc_assets})
+            asset_data.append({'Company': company, 'Type': 'Current Assets', 'Value': c_assets})
+
+    if not asset_data:
+        return None
+
+    fig = px.bar(
+        pd.DataFrame(asset_data),
+        x='Company',
+        y='Value',
+        color='Type',
+        barmode='stack',
+        color_discrete_sequence=['#1f77b4', '#ff7f0e'],
+        title="Asset Composition"
+    )
+    fig.update_yaxes(tickformat=".0%")
+    fig.update_layout(height=400)
+    return fig
+
+
+def financing_structure_chart(ratio_cube, companies, year='2024'):
+    """Equity and liabilities shares, stacked per company"""
+    import plotly.express as px
+
+    financing_data = []
+    for company in companies:
+        equity = ratio_cube.value(company, "Equity Ratio", year)
+        nc_liab = ratio_cube.value(company, "Non-current Liabilities Ratio", year)
+        c_liab = ratio_cube.value(company, "Current Liabilities Ratio", year)
+
+        if equity and nc_liab and c_liab:
+            financing_data.append({'Company': company, 'Type': 'Equity', 'Value': equity})
+            financing_data.append({'Company': company, 'Type': 'Non-current Liabilities', 'Value': nc_liab})
+            financing_data.append({'Company': company, 'Type': 'Current Liabilities', 'Value': c_liab})
+
+    if not financing_data:
+        return None
+
+    fig = px.bar(
+        pd.DataFrame(financing_data),
+        x='Company',
+        y='Value',
+        color='Type',
+        barmode='stack',
+        color_discrete_sequence=['#2ca02c', '#d62728', '#9467bd'],
+        title="Financing Structure"
+    )
+    fig.update_yaxes(tickformat=".0%")
+    fig.update_layout(height=400)
+    return fig
+
+
+def cash_flow_waterfall(inputs_cube, company, year='2024'):
+    """Operating, investing and financing cash flows adding up to the net cash flow"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Waterfall(
+        name=f"{company} {year}",
+        orientation="v",
+        measure=["relative", "relative", "relative", "total"],
+        x=CASH_FLOW_LABELS,
+        y=inputs_cube.slice(company, CASH_FLOW_ITEMS, year),
+        textposition="outside",
+        connector={"line": {"color": "rgb(63, 63, 63)"}},
+        decreasing={"marker": {"color": "#d62728"}},
+        increasing={"marker": {"color": "#2ca02c"}},
+        totals={"marker": {"color": "#1f77b4"}}
+    ))
+
+    fig.update_layout(
+        title=f"Cash Flow Waterfall - {company} ({year})",
+        showlegend=False,
+        height=400
+    )
+    return fig
+
+
+def trend_chart(series, ratio, company_colors):
+    """Line per company over the periods of TrendSet.series"""
+    import plotly.express as px
+
+    fig = px.line(
+        series,
+        x='Period',
+        y='Value',
+        color='Company',
+        markers=True,
+        color_discrete_map=company_colors,
+        title=f"{ratio} over time"
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def sensitivity_heatmap(surface, company, ratio, direction):
+    """Ratio over a payables-days × revenue-change grid (green is better)"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=go.Heatmap(
+        z=surface.values,
+        x=[f"{v * 100:+.0f}%" for v in surface.columns],
+        y=[f"{v:.0f}" for v in surface.index],
+        colorscale='RdYlGn_r' if direction < 0 else 'RdYlGn',
+        colorbar=dict(title=ratio)
+    ))
+    fig.update_layout(
+        title=f"{company}: {ratio}",
+        xaxis_title="Revenue change",
+        yaxis_title="Payables stretched (days)",
+        height=450
+    )
+    return fig
+
+
+def breach_probability_chart(long_results, company_colors):
+    """Stress-test breach probability per threshold and company"""
+    import plotly.express as px
+
+    fig = px.bar(
+        long_results,
+        x='Breach',
+        y='Probability',
+        color='Company',
+        barmode='group',
+        color_discrete_map=company_colors,
+        title="Probability of breaching each critical threshold (2024, one-year shocks)"
+    )
+    fig.update_layout(height=400, yaxis_tickformat=".0%")
+    return fig
+
+
+def section_timing_chart(summary):
+    """p50 / p95 per instrumented section (instrumentation.TimingBuffer.summary)"""
+    import plotly.express as px
+
+    fig = px.bar(
+        summary.melt(id_vars='section', value_vars=['p50_ms', 'p95_ms'], var_name='Percentile', value_name='ms'),
+        x='section',
+        y='ms',
+        color='Percentile',
+        barmode='group',
+        title="Section timings (p50 / p95)"
+    )
+    fig.update_layout(height=350)
+    return fig
+
+
+def cluster_map(projection, companies, clusters, highlighted, company_colors):
+    """
+    Companies on the first two principal components, colored by cluster.
+    WebGL markers keep tens of thousands of points responsive; the highlighted
+    companies are drawn on top with their dashboard colors and labels.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    palette = px.colors.qualitative.Set2
+    for cluster in sorted(set(clusters)):
+        members = clusters == cluster
+        fig.add_trace(go.Scattergl(
+            x=projection[members, 0],
+            y=projection[members, 1],
+            mode='markers',
+            name=f"Cluster {cluster}",
+            text=[company for company, member in zip(companies, members) if member],
+            hovertemplate="%{text}<extra>" + f"Cluster {cluster}" + "</extra>",
+            marker=dict(size=6, opacity=0.6, color=palette[(cluster - 1) % len(palette)])
+        ))
+
+    index = {company: i for i, company in enumerate(companies)}
+    shown = [company for company in highlighted if company in index]
+    if shown:
+        rows = [index[company] for company in shown]
+        fig.add_trace(go.Scatter(
+            x=projection[rows, 0],
+            y=projection[rows, 1],
+            mode='markers+text',
+            name="Selected",
+            text=shown,
+            textposition="top center",
+            marker=dict(size=14, color=[company_colors.get(company, '#333333') for company in shown],
+                        line=dict(width=2, color='black'))
+        ))
+
+    fig.update_layout(
+        title="Peer clusters (principal components of the standardized ratios)",
+        xaxis_title="Component 1",
+        yaxis_title="Component 2",
+        height=500
+    )
+    return fig
+
+
+def correlation_heatmap(corr):
+    """Ratio × ratio correlation matrix"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=go.Heatmap(
+        z=corr.values,
+        x=list(corr.columns),
+        y=list(corr.index),
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu_r',
+        colorbar=dict(title="r")
+    ))
+    fig.update_layout(title="Correlation between ratios across companies", height=600)
+    return fig
@@ -0,0 +1,250 @@
+"""Peer groups and redundant ratios across the whole company universe.
+
+A RatioProfile standardizes the company × ratio matrix of one year once:
+every ratio becomes a z-score over the companies that report it, clipped so
+that a few extreme values (interest coverage near a zero expense, say) do not
+dominate the distances. Missing ratios sit at the mean (z = 0).
+
+Correlations use every pair of companies reporting both ratios and are
+computed with a handful of matrix products. Nearest peers and k-means clusters
+use blocked distance matrices, so memory stays bounded and nothing loops over
+company pairs in Python.
+"""
+import numpy as np
+import pandas as pd
+
+# Standardized values are clipped to ±Z_CLIP
+Z_CLIP = 4.0
+
+# Ratios reported by fewer companies than this share are left out
+MIN_COVERAGE = 0.5
+
+# |correlation| from which two ratios count as carrying the same information,
+# and the companies two ratios must share before their correlation means anything
+REDUNDANCY_THRESHOLD = 0.95
+MIN_SHARED_COMPANIES = 10
+
+# Rows × companies of one block of the distance matrix (bounds memory)
+BLOCK_ELEMENTS = 4_000_000
+
+
+class RatioProfile:
+    """Standardized company × ratio matrix of one year, aligned with the cube it came from"""
+
+    def __init__(self, cube, year, min_coverage=MIN_COVERAGE):
+        self.year = year
+        self.companies = cube.companies
+        self.company_index = cube.company_index
+
+        raw = cube.values[:, :, cube.year_index[year]].astype(np.float64)
+        present = np.isfinite(raw)
+
+        # Keep ratios most companies report and that actually vary between them
+        keep = present.mean(axis=0) >= min_coverage if len(raw) else np.zeros(raw.shape[1], dtype=bool)
+        keep[keep] = np.nanstd(np.where(present[:, keep], raw[:, keep], np.nan), axis=0) > 0
+
+        self.ratios = [ratio for ratio, kept in zip(cube.items, keep) if kept]
+        self.raw = raw[:, keep]
+        self.present = present[:, keep]
+
+        values = np.where(self.present, self.raw, np.nan)
+        self.mean = np.nanmean(values, axis=0)
+        self.std = np.nanstd(values, axis=0)
+        z = np.clip((values - self.mean) / self.std, -Z_CLIP, Z_CLIP)
+        self.z = np.where(self.present, z, 0.0)
+
+    def correlation(self):
+        """Pairwise-complete Pearson correlation of the ratios (ratio × ratio DataFrame)"""
+        return pd.DataFrame(pairwise_correlation(self.raw, self.present), index=self.ratios, columns=self.ratios)
+
+    def redundant_pairs(self, threshold=REDUNDANCY_THRESHOLD, min_companies=MIN_SHARED_COMPANIES):
+        """
+        Ratio pairs carrying the same information, strongest first: |correlation| of at
+        least `threshold` over `min_companies` or more, or identical for every company.
+        """
+        corr = pairwise_correlation(self.raw, self.present)
+        shared = self.present.T.astype(np.float64) @ self.present
+
+        # Identical columns (same values, same gaps) share a row of np.unique
+        filled = np.where(self.present, np.round(self.raw, 12), np.inf).T
+        _, group = np.unique(filled, axis=0, return_inverse=True)
+        identical = group.ravel()[:, None] == group.ravel()[None, :]
+
+        strong = (np.abs(np.nan_to_num(corr)) >= threshold) & (shared >= min_companies)
+        i, j = np.nonzero(np.triu(strong | identical, k=1))
+        pairs = pd.DataFrame({
+            'ratio': [self.ratios[k] for k in i],
+            'redundant_with': [self.ratios[k] for k in j],
+            'correlation': corr[i, j],
+            'companies': shared[i, j].astype(int),
+            'identical': identical[i, j],
+        })
+        strength = np.where(pairs['identical'], 2.0, pairs['correlation'].abs().fillna(0))
+        return pairs.iloc[np.argsort(-strength, kind='stable')].reset_index(drop=True)
+
+    def peers(self, companies, k=5):
+        """The k nearest companies to each of `companies` (long DataFrame, closest first)"""
+        rows = np.array([self.company_index[company] for company in companies], dtype=np.int64)
+        neighbours, distances = nearest_neighbours(self.z, rows, k)
+        return pd.DataFrame({
+            'company': np.repeat([self.companies[r] for r in rows], neighbours.shape[1]),
+            'rank': np.tile(np.arange(1, neighbours.shape[1] + 1), len(rows)),
+            'peer': [self.companies[n] for n in neighbours.ravel()],
+            'distance': distances.ravel(),
+        })
+
+    def projection(self):
+        """First two principal components of the standardized matrix (company × 2)"""
+        if self.z.shape[1] < 2:
+            return np.zeros((len(self.z), 2))
+        centered = self.z - self.z.mean(axis=0)
+        # Ratio × ratio eigenproblem: cheap however many companies there are
+        eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+        return centered @ eigenvectors[:, ::-1][:, :2]
+
+
+def pairwise_correlation(values, present):
+    """
+    Correlation of every pair of columns over the rows where both are present.
+    Masked sums make it a few (ratio × company) @ (company × ratio) products.
+    """
+    # Center and scale each column first: raw magnitudes (Working Capital) would lose precision
+    mask = present.astype(np.float64)
+    counts = np.maximum(mask.sum(axis=0), 1)
+    mean = np.where(present, values, 0.0).sum(axis=0) / counts
+    x = np.where(present, values - mean, 0.0)
+    scale = np.sqrt((x * x).sum(axis=0) / counts)
+    x = x / np.where(scale > 0, scale, 1.0)
+
+    n = mask.T @ mask
+    sum_x = x.T @ mask                # sum of column i over rows where j is present too
+    sum_xx = (x * x).T @ mask
+    sum_xy = x.T @ x
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = n * sum_xy - sum_x * sum_x.T
+        variance = (n * sum_xx - sum_x ** 2) * (n * sum_xx - sum_x ** 2).T
+        corr = np.where((n > 2) & (variance > 0), covariance / np.sqrt(variance), np.nan)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _row_blocks(n_rows, n_columns):
+    """Slices of rows so a block of the distance matrix holds about BLOCK_ELEMENTS values"""
+    block = max(1, BLOCK_ELEMENTS // max(1, n_columns))
+    return [slice(start, start + block) for start in range(0, n_rows, block)]
+
+
+def squared_distances(a, b, b_norms=None):
+    """Squared Euclidean distances between the rows of a and b (|a|² + |b|² - 2ab)"""
+    b_norms = (b * b).sum(axis=1) if b_norms is None else b_norms
+    distances = (a * a).sum(axis=1)[:, None] + b_norms[None, :] - 2.0 * (a @ b.T)
+    return np.maximum(distances, 0.0)
+
+
+def nearest_neighbours(z, rows, k):
+    """Indices and distances of the k nearest other rows of z for each of `rows`"""
+    k = min(k, len(z) - 1)
+    if k <= 0:
+        return np.empty((len(rows), 0), dtype=np.int64), np.empty((len(rows), 0))
+
+    norms = (z * z).sum(axis=1)
+    neighbours = np.empty((len(rows), k), dtype=np.int64)
+    distances = np.empty((len(rows), k))
+    for block in _row_blocks(len(rows), len(z)):
+        block_rows = rows[block]
+        d = squared_distances(z[block_rows], z, norms)
+        d[np.arange(len(block_rows)), block_rows] = np.inf    # a company is not its own peer
+
+        nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+        nearest_d = np.take_along_axis(d, nearest, axis=1)
+        order = np.argsort(nearest_d, axis=1)
+        neighbours[block] = np.take_along_axis(nearest, order, axis=1)
+        distances[block] = np.sqrt(np.take_along_axis(nearest_d, order, axis=1))
+    return neighbours, distances
+
+
+def _assign(z, centers):
+    """Nearest center of every row and the squared distance to it"""
+    labels = np.empty(len(z), dtype=np.int64)
+    inertia = np.empty(len(z))
+    center_norms = (centers * centers).sum(axis=1)
+    for block in _row_blocks(len(z), len(centers)):
+        d = squared_distances(z[block], centers, center_norms)
+        labels[block] = d.argmin(axis=1)
+        inertia[block] = d[np.arange(len(d)), labels[block]]
+    return labels, inertia
+
+
+def _seed_centers(z, n_clusters, rng):
+    """Greedy k-means++: of a few candidates drawn by squared distance, keep the one that helps most"""
+    n_candidates = 2 + int(np.log(n_clusters))
+    centers = [z[rng.integers(len(z))]]
+    closest = squared_distances(z, centers[0][None, :])[:, 0]
+    for _ in range(1, n_clusters):
+        total = closest.sum()
+        if total <= 0:
+            centers.append(z[rng.integers(len(z))])
+            continue
+        candidates = rng.choice(len(z), size=n_candidates, p=closest / total)
+        candidate_closest = np.minimum(closest[:, None], squared_distances(z, z[candidates]))
+        best = candidate_closest.sum(axis=0).argmin()
+        centers.append(z[candidates[best]])
+        closest = candidate_closest[:, best]
+    return np.array(centers)
+
+
+def _lloyd(z, centers, max_iter, tol):
+    """Lloyd iterations from the given centers; returns (labels, centers, inertia)"""
+    previous = np.inf
+    for _ in range(max_iter):
+        labels, distances = _assign(z, centers)
+        inertia = distances.sum()
+
+        counts = np.bincount(labels, minlength=len(centers))
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, z)
+        empty = counts == 0
+        centers = np.where(empty[:, None], centers, sums / np.maximum(counts, 1)[:, None])
+        if empty.any():
+            # Restart an empty cluster on the point farthest from its center
+            centers[np.flatnonzero(empty)] = z[np.argsort(distances)[::-1][:empty.sum()]]
+
+        if previous - inertia <= tol * max(previous, 1.0):
+            break
+        previous = inertia
+
+    labels, distances = _assign(z, centers)
+    return labels, centers, float(distances.sum())
+
+
+def kmeans(z, n_clusters, seed=0, n_init=4, max_iter=100, tol=1e-6):
+    """
+    k-means with greedy k-means++ seeding; the best of `n_init` runs is kept.
+    Returns (labels, centers, inertia); clusters are numbered by decreasing size.
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = max(1, min(n_clusters, len(z)))
+
+    best = None
+    for _ in range(n_init):
+        result = _lloyd(z, _seed_centers(z, n_clusters, rng), max_iter, tol)
+        if best is None or result[2] < best[2]:
+            best = result
+    labels, centers, inertia = best
+
+    order = np.argsort(-np.bincount(labels, minlength=n_clusters), kind='stable')
+    relabel = np.empty_like(order)
+    relabel[order] = np.arange(n_clusters)
+    return relabel[labels], centers[order], inertia
+
+
+def cluster_companies(profile, n_clusters, seed=0):
+    """Cluster of every company and each cluster's median ratios"""
+    labels, _, _ = kmeans(profile.z, n_clusters, seed=seed)
+    assignments = pd.DataFrame({'company': profile.companies, 'cluster': labels + 1})
+
+    raw = pd.DataFrame(np.where(profile.present, profile.raw, np.nan), columns=profile.ratios)
+    profiles = raw.groupby(labels + 1).median()
+    profiles.insert(0, 'companies', np.bincount(labels)[profiles.index - 1])
+    profiles.index.name = 'cluster'
+    return assignments, profiles
@@ -0,0 +1,95 @@
+"""Dense company × item × year arrays built once from the long master tables.
+
+The master tables store one row per (company, item); slicing them per company
+on every rerun means a boolean scan of the whole table each time. A cube is
+pivoted once per data version and then sliced by integer position.
+"""
+import numpy as np
+import pandas as pd
+
+
+def year_columns(df):
+    """Fiscal year columns of a master table ('2023', '2024', ...), in order"""
+    return sorted(col for col in df.columns if str(col).isdigit())
+
+
+class MasterCube:
+    """
+    values[c, i, y] is the value of item/ratio i for company c in year y
+    (NaN where the master table has no row); present[c, i] tells whether
+    the row exists at all.
+    """
+
+    def __init__(self, companies, items, years, values, present):
+        self.companies = list(companies)
+        self.items = list(items)
+        self.years = list(years)
+        self.values = values
+        self.present = present
+        self.company_index = {company: i for i, company in enumerate(self.companies)}
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+        self.year_index = {year: i for i, year in enumerate(self.years)}
+
+    @classmethod
+    def from_frame(cls, df, item_col, dtype=None):
+        """
+        Pivot a long master table (company | item_col | years...) into a cube.
+        Values keep the year columns' float dtype (chosen by compact_master_frames)
+        unless `dtype` is given; other column types become float64.
+        """
+        years = year_columns(df)
+        if dtype is None:
+            dtype = np.result_type(*df[years].dtypes) if years else np.float64
+            if not np.issubdtype(dtype, np.floating):
+                dtype = np.float64
+
+        # Rows without a company or item cannot be looked up; first row wins for duplicates,
+        # like the .values[0] lookups
+        df = df.dropna(subset=['company', item_col])
+        df = df.drop_duplicates(subset=['company', item_col], keep='first')
+
+        company_codes, companies = _factorize(df['company'])
+        item_codes, items = _factorize(df[item_col])
+
+        values = np.full((len(companies), len(items), len(years)), np.nan, dtype=dtype)
+        values[company_codes, item_codes, :] = df[years].to_numpy(dtype=dtype)
+        present = np.zeros((len(companies), len(items)), dtype=bool)
+        present[company_codes, item_codes] = True
+        return cls(companies, items, years, values, present)
+
+    def slice(self, company, items, year):
+        """Values of several items for one company and year (NaN for unknown items)"""
+        row = self.values[self.company_index[company], :, self.year_index[year]]
+        return np.array([row[self.item_index[item]] if item in self.item_index else np.nan for item in items])
+
+    def select(self, companies, items, year):
+        """2-D (company × item) block for one year"""
+        company_idx = [self.company_index[company] for company in companies]
+        item_idx = [self.item_index[item] for item in items]
+        return self.values[np.ix_(company_idx, item_idx)][:, :, self.year_index[year]]
+
+    def value(self, company, item, year):
+        """
+        Single value as a float (NaN if the row holds NaN),
+        or None if the company has no such row.
+        """
+        try:
+            c, i, y = self.company_index[company], self.item_index[item], self.year_index[year]
+        except KeyError:
+            return None
+        if not self.present[c, i]:
+            return None
+        return float(self.values[c, i, y])
+
+
+def _factorize(series):
+    """
+    Integer codes and the labels they refer to. Categoricals reuse their own codes,
+    keeping only the categories present: the master tables share one company
+    dictionary, so a table's categories can include companies it has no rows for.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.remove_unused_categories()
+        return series.cat.codes.to_numpy(), list(series.cat.categories)
+    codes, labels = series.factorize(sort=True)
+    return codes, list(labels)
@@ -0,0 +1,97 @@
+"""Lightweight timing of dashboard sections and pipeline stages.
+
+Timings go into a process-wide ring buffer, so recording costs one
+perf_counter pair and a deque append. Summaries (p50/p95 per section) are
+only computed when the debug panel asks for them. Set
+RATIOS_TIMING=0 to turn recording off entirely, and RATIOS_TIMING_LOG to a
+file path to also append every timing to a log file.
+"""
+import collections
+import contextlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("ratios.timing")
+
+
+class TimingBuffer:
+    """Fixed-size ring buffer of (timestamp, section, seconds) records"""
+
+    def __init__(self, maxlen=5000, enabled=True):
+        # deque.append is atomic, so sessions can record concurrently without a lock
+        self._records = collections.deque(maxlen=maxlen)
+        self.enabled = enabled
+
+    def record(self, section, seconds):
+        if not self.enabled:
+            return
+        self._records.append((time.time(), section, seconds))
+        logger.debug("%s %.6f", section, seconds)
+
+    def record_many(self, stage_timings, prefix=""):
+        """Record a {stage: seconds} dict, e.g. timings returned by a worker process"""
+        if not self.enabled:
+            return
+        for stage, seconds in stage_timings.items():
+            self.record(prefix + stage, seconds)
+
+    @contextlib.contextmanager
+    def section(self, name):
+        """Time the body of a `with` block under `name`"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def records(self):
+        """All buffered timings as a DataFrame (timestamp | section | seconds)"""
+        return pd.DataFrame(list(self._records), columns=['timestamp', 'section', 'seconds'])
+
+    def summary(self):
+        """Per-section count, p50, p95, mean, max and last value (milliseconds)"""
+        records = self.records()
+        if records.empty:
+            return pd.DataFrame(columns=['section', 'count', 'p50_ms', 'p95_ms', 'mean_ms', 'max_ms', 'last_ms'])
+
+        rows = []
+        for section, group in records.groupby('section', sort=False):
+            ms = group['seconds'].to_numpy() * 1000
+            rows.append({
+                'section': section,
+                'count': len(ms),
+                'p50_ms': np.percentile(ms, 50),
+                'p95_ms': np.percentile(ms, 95),
+                'mean_ms': ms.mean(),
+                'max_ms': ms.max(),
+                'last_ms': ms[-1],
+            })
+        return pd.DataFrame(rows)
+
+    def to_jsonl(self):
+        """Buffered timings as JSON lines (one record per line)"""
+        return "\n".join(
+            json.dumps({'timestamp': ts, 'section': section, 'seconds': seconds})
+            for ts, section, seconds in list(self._records)
+        )
+
+    def clear(self):
+        self._records.clear()
+
+
+# One buffer per server process, shared by every session
+timings = TimingBuffer(enabled=os.environ.get("RATIOS_TIMING", "1") != "0")
+
+if os.environ.get("RATIOS_TIMING_LOG"):
+    _handler = logging.FileHandler(os.environ["RATIOS_TIMING_LOG"])
+    _handler.setFormatter(logging.Formatter("%(created).3f %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.DEBUG)
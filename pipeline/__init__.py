@@ -0,0 +1,2 @@
+"""Statement ingestion and ratio computation shared by the notebooks' offline
+workflow, the dashboard upload path and the batch tools."""
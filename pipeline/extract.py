@@ -0,0 +1,85 @@
+"""Extraction of standardized input items from 'YC' statement sheets
+(the importable form of inputs.ipynb)."""
+import os
+
+import pandas as pd
+
+standardize_dict = {
+    "assets": "total_assets",
+    "non-current assets": "non_current_assets",
+    "current assets": "current_assets",
+    "equity shareholders of the parent": "equity",
+    "non-current liabilities": "non_current_liabilities",
+    "current liabilities": "current_liabilities",
+    "gross profit/loss on sales": "gross_profit",
+    "revenues from sales": "revenue",
+    "operating profit/loss": "operating_profit",
+    "profit/loss before tax": "profit_before_tax",
+    "net profit/loss": "net_profit",
+    "financial expenses": "financial_expenses",
+    "inventories": "inventory",
+    "trade receivables": "trade_receivables",
+    "cash and cash equivalents": "cash_and_equivalents",
+    "trade payables": "trade_payables",
+    "depreciation": "depreciation",
+    "cash flow from operating activities": "operating_cash_flow",
+    "cash flow from investing activities": "investing_cash_flow",
+    "cash flow from financing activities": "financing_cash_flow",
+    "net cash flow": "net_cash_flow"
+}
+
+# Columns of the 'YC' sheet that hold the item labels and the two fiscal years
+required_cols = ['Accounting period', '01.23-12.23', '01.24-12.24']
+
+# Rows above this offset are the summary block (metadata and duplicated totals)
+HEADER_ROWS = 28
+
+
+def company_name_from_filename(filename):
+    """Company name is the workbook file name without its extension"""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def read_statement_sheet(source):
+    """Read the raw 'YC' sheet from a path or an uploaded file-like object"""
+    return pd.read_excel(source, sheet_name='YC')
+
+
+def extract_inputs_from_sheet(df, company_name, filename=None):
+    """Standardized input items (item | 2023 | 2024 | company) from a raw 'YC' sheet"""
+    # Keep only the relevant columns, check if columns exist first
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing columns in {filename or company_name}: {missing_cols}")
+
+    df = df[required_cols]
+
+    # Skip the summary block at the top of the sheet
+    df = df.iloc[HEADER_ROWS:].reset_index(drop=True)
+
+    # Rename columns for simplicity
+    df.columns = ['item', '2023', '2024']
+
+    # Clean and standardize the 'item' names
+    df['item'] = df['item'].astype(str).str.lower().str.strip()
+    df['item'] = df['item'].map(standardize_dict)
+
+    # Drop rows where 'item' mapping returned NaN (no match)
+    df = df.dropna(subset=['item'])
+
+    # Values come from a mixed-type sheet; store them as numbers like the saved workbooks
+    df[['2023', '2024']] = df[['2023', '2024']].astype(float)
+
+    # Add a company column for identification later
+    df['company'] = company_name
+
+    # Sort by 'item' for easier reading
+    df = df.sort_values('item').reset_index(drop=True)
+
+    return df
+
+
+def extract_financial_inputs(filename):
+    """Load a statement workbook and return its standardized input items"""
+    df = read_statement_sheet(filename)
+    return extract_inputs_from_sheet(df, company_name_from_filename(filename), filename)
@@ -0,0 +1,35 @@
+"""One-pass processing of a statement workbook: parse the 'YC' sheet once and
+derive both the input items and the ratios from it."""
+import io
+import time
+
+from pipeline.extract import read_statement_sheet, extract_inputs_from_sheet, company_name_from_filename
+from pipeline.ratios import statement_from_sheet, compute_company_ratios
+
+
+def process_workbook(source, filename):
+    """
+    Parse a statement workbook and compute its inputs and ratios.
+    `source` is a path or the raw bytes of an uploaded file; `filename` names the company.
+    Returns (company_name, inputs_df, ratios_df, stage_timings) where stage_timings
+    maps each pipeline stage to its duration in seconds.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    company_name = company_name_from_filename(filename)
+    stage_timings = {}
+
+    start = time.perf_counter()
+    sheet = read_statement_sheet(source)
+    stage_timings['read_sheet'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inputs_df = extract_inputs_from_sheet(sheet, company_name, filename)
+    stage_timings['extract_inputs'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ratios_df = compute_company_ratios(statement_from_sheet(sheet), company_name)
+    stage_timings['compute_ratios'] = time.perf_counter() - start
+
+    return company_name, inputs_df, ratios_df, stage_timings
@@ -0,0 +1,123 @@
+"""Consolidation of per-company tables into the master tables used by the
+dashboard (the importable form of master.ipynb plus the dashboard's cleaning)."""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def build_master(frames):
+    """Concatenate per-company tables into one master table"""
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_master_from_files(pattern):
+    """Concatenate every workbook matching the glob pattern (e.g. '*_ratios.xlsx')"""
+    files = sorted(glob.glob(pattern))
+    return build_master([pd.read_excel(file) for file in files])
+
+
+# Day-count ratios the cash conversion cycle is built from
+CASH_CYCLE_RATIOS = ['Days Sales Outstanding', 'Days to Sell Inventory', 'Days Payable Outstanding']
+
+
+def add_cash_conversion_cycle(master_df, companies=None):
+    """Append a 'Cash Conversion Cycle' row (DSO + inventory days - DPO, 2024) per company"""
+    if companies is None:
+        companies = master_df['company'].unique()
+
+    # First row of each (company, day-count ratio), like the former .values[0] lookups
+    rows = master_df[master_df['ratio_name'].isin(CASH_CYCLE_RATIOS)].drop_duplicates(
+        subset=['company', 'ratio_name'], keep='first'
+    )
+    days = rows.pivot(index='company', columns='ratio_name', values='2024')
+
+    # Only companies that have all three rows (their values may still be NaN)
+    counts = rows['company'].value_counts()
+    complete = [company for company in companies if counts.get(company, 0) == len(CASH_CYCLE_RATIOS)]
+    if not complete:
+        return master_df
+
+    days = days.loc[complete]
+    new_rows = pd.DataFrame({
+        'company': complete,
+        'category': 'activity',
+        'ratio_name': 'Cash Conversion Cycle',
+        '2023': np.nan,
+        '2024': (days['Days Sales Outstanding'] + days['Days to Sell Inventory']
+                 - days['Days Payable Outstanding']).to_numpy()
+    })
+    return pd.concat([master_df, new_rows], ignore_index=True)
+
+
+def clean_master_frames(master_df, master_inputs_df):
+    """Clean the raw master tables and add the derived dashboard metrics"""
+    # Clean column names
+    master_df.columns = master_df.columns.astype(str).str.strip()
+    master_inputs_df.columns = master_inputs_df.columns.astype(str).str.strip()
+
+    # Clean master_inputs - remove duplicate depreciation entries
+    master_inputs_df = master_inputs_df.drop_duplicates(subset=['item', 'company', '2023', '2024'], keep='first')
+
+    # Add some calculated metrics
+    master_df = add_cash_conversion_cycle(master_df)
+    return master_df, master_inputs_df
+
+
+def load_master_frames(data_dir):
+    """Read and clean master_ratios.xlsx / master_inputs.xlsx from a pipeline directory"""
+    master_df = pd.read_excel(os.path.join(data_dir, "master_ratios.xlsx"))
+    master_inputs_df = pd.read_excel(os.path.join(data_dir, "master_inputs.xlsx"))
+    return clean_master_frames(master_df, master_inputs_df)
+
+
+def merge_company(master_df, master_inputs_df, company_ratios, company_inputs):
+    """
+    Replace (or add) one company's rows in the cleaned master tables.
+    Only the new company's derived metrics are computed.
+    """
+    companies = set(company_ratios['company']) | set(company_inputs['company'])
+
+    company_ratios = add_cash_conversion_cycle(company_ratios)
+    company_inputs = company_inputs.drop_duplicates(subset=['item', 'company', '2023', '2024'], keep='first')
+
+    master_df = pd.concat(
+        [master_df[~master_df['company'].isin(companies)], company_ratios],
+        ignore_index=True
+    )
+    master_inputs_df = pd.concat(
+        [master_inputs_df[~master_inputs_df['company'].isin(companies)], company_inputs],
+        ignore_index=True
+    )
+    return master_df, master_inputs_df
+
+
+def compact_master_frames(master_df, master_inputs_df):
+    """
+    Compact in-memory form of the cleaned master tables.
+    Label columns become categoricals (company shares one dictionary across both
+    tables, so its codes line up). Year columns stay float64: the ratio table
+    also holds amounts (Working Capital), and float32 cannot hold those or the
+    exported ratios to full precision.
+    """
+    companies = pd.CategoricalDtype(
+        sorted(set(master_df['company'].dropna()) | set(master_inputs_df['company'].dropna()))
+    )
+
+    master_df = master_df.astype({
+        'company': companies,
+        'category': 'category',
+        'ratio_name': 'category',
+        **{year: np.float64 for year in _year_columns(master_df)}
+    })
+    master_inputs_df = master_inputs_df.astype({
+        'company': companies,
+        'item': 'category',
+        **{year: np.float64 for year in _year_columns(master_inputs_df)}
+    })
+    return master_df.reset_index(drop=True), master_inputs_df.reset_index(drop=True)
+
+
+def _year_columns(df):
+    return [col for col in df.columns if str(col).isdigit()]
@@ -0,0 +1,406 @@
+"""Per-company ratio calculation from a 'YC' statement sheet
+(the importable form of analysis.ipynb)."""
+import pandas as pd
+
+from pipeline.extract import HEADER_ROWS, read_statement_sheet, company_name_from_filename
+
+
+def statement_from_sheet(df):
+    """
+    Turn a raw 'YC' sheet into a statement indexed by lower-case item name
+    with one column per year.
+    """
+    df = df[['Accounting period', '01.23-12.23', '01.24-12.24']]
+    df = df.iloc[HEADER_ROWS:].reset_index(drop=True)
+
+    # renaming columns for easy reference
+    df = df.rename(
+        columns={
+            'Accounting period': 'Item',
+            '01.23-12.23': '2023',
+            '01.24-12.24': '2024'
+        }
+    )
+    df = df.set_index('Item')
+    df.index = (
+        df.index.astype(str)
+                .str.strip()          # remove extra spaces
+                .str.lower()          # lowercase
+    )
+    return df
+
+
+def get_value_year(df, item_name, year):
+    """
+    Get the value from the dataframe at index=item_name and column=year.
+    Returns None if missing or NaN.
+    """
+    try:
+        val = df.loc[item_name, year]
+        if pd.isna(val):
+            return None
+        return val
+    except KeyError:
+        return None
+
+
+# Vertical analysis (structure and margins)
+
+def non_current_assets_ratio_year(df, year):
+    non_current_assets = get_value_year(df, 'non-current assets', year)
+    total_assets = get_value_year(df, 'assets', year)
+    if non_current_assets is not None and total_assets:
+        return non_current_assets / total_assets
+    return None
+
+
+def current_assets_ratio_year(df, year):
+    current_assets = get_value_year(df, 'current assets', year)
+    total_assets = get_value_year(df, 'assets', year)
+    if current_assets is not None and total_assets:
+        return current_assets / total_assets
+    return None
+
+
+def equity_ratio_year(df, year):
+    equity = get_value_year(df, 'equity shareholders of the parent', year)
+    equity_and_liabilities = get_value_year(df, 'assets', year)
+    if equity is not None and equity_and_liabilities:
+        return equity / equity_and_liabilities
+    return None
+
+
+def non_current_liabilities_ratio_year(df, year):
+    non_current_liabilities = get_value_year(df, 'non-current liabilities', year)
+    equity_and_liabilities = get_value_year(df, 'assets', year)
+    if non_current_liabilities is not None and equity_and_liabilities:
+        return non_current_liabilities / equity_and_liabilities
+    return None
+
+
+def current_liabilities_ratio_year(df, year):
+    current_liabilities = get_value_year(df, 'current liabilities', year)
+    equity_and_liabilities = get_value_year(df, 'assets', year)
+    if current_liabilities is not None and equity_and_liabilities:
+        return current_liabilities / equity_and_liabilities
+    return None
+
+
+def gross_margin_year(df, year):
+    gross_profit = get_value_year(df, 'gross profit/loss on sales', year)
+    sales_revenue = get_value_year(df, 'revenues from sales', year)
+    if gross_profit is not None and sales_revenue:
+        return gross_profit / sales_revenue
+    return None
+
+
+def operating_margin_year(df, year):
+    operating_profit = get_value_year(df, 'operating profit/loss', year)
+    sales_revenue = get_value_year(df, 'revenues from sales', year)
+    if operating_profit is not None and sales_revenue:
+        return operating_profit / sales_revenue
+    return None
+
+
+def ebit_margin_year(df, year):
+    profit_before_tax = get_value_year(df, 'profit/loss before tax', year)
+    sales_revenue = get_value_year(df, 'revenues from sales', year)
+    if profit_before_tax is not None and sales_revenue:
+        return profit_before_tax / sales_revenue
+    return None
+
+
+def net_profit_margin_year(df, year):
+    net_profit = get_value_year(df, 'net profit/loss', year)
+    sales_revenue = get_value_year(df, 'revenues from sales', year)
+    if net_profit is not None and sales_revenue:
+        return net_profit / sales_revenue
+    return None
+
+
+def all_vertical_ratios_year(df, year):
+    """
+    Returns all ratios as a dictionary for the given year.
+    """
+    return {
+        'Non-current Assets Ratio': non_current_assets_ratio_year(df, year),
+        'Current Assets Ratio': current_assets_ratio_year(df, year),
+        'Equity Ratio': equity_ratio_year(df, year),
+        'Non-current Liabilities Ratio': non_current_liabilities_ratio_year(df, year),
+        'Current Liabilities Ratio': current_liabilities_ratio_year(df, year),
+        'Gross Margin': gross_margin_year(df, year),
+        'Operating Margin': operating_margin_year(df, year),
+        'EBIT Margin': ebit_margin_year(df, year),
+        'Net Profit Margin': net_profit_margin_year(df, year)
+    }
+
+
+# Liquidity
+
+def current_ratio_year(df, year):
+    current_assets = get_value_year(df, 'current assets', year)
+    current_liabilities = get_value_year(df, 'current liabilities', year)
+    if current_assets is not None and current_liabilities:
+        return current_assets / current_liabilities
+    return None
+
+
+def quick_ratio_year(df, year):
+    current_assets = get_value_year(df, 'current assets', year)
+    inventory = get_value_year(df, 'inventory', year)
+    current_liabilities = get_value_year(df, 'current liabilities', year)
+    if current_assets is not None and current_liabilities:
+        if inventory is None:
+            inventory = 0
+        return (current_assets - inventory) / current_liabilities
+    return None
+
+
+def cash_holdings_ratio_year(df, year):
+    cash_and_equivalents = get_value_year(df, 'cash and cash equivalents', year)
+    total_assets = get_value_year(df, 'assets', year)
+    if cash_and_equivalents is not None and total_assets:
+        return cash_and_equivalents / total_assets
+    return None
+
+
+def working_capital_year(df, year):
+    current_assets = get_value_year(df, 'current assets', year)
+    current_liabilities = get_value_year(df, 'current liabilities', year)
+    if current_assets is not None and current_liabilities is not None:
+        return current_assets - current_liabilities
+    return None
+
+
+def all_liquidity_ratios_year(df, year):
+    return {
+        'Current Ratio': current_ratio_year(df, year),
+        'Quick Ratio': quick_ratio_year(df, year),
+        'Cash Holdings Ratio': cash_holdings_ratio_year(df, year),
+        'Working Capital': working_capital_year(df, year)
+    }
+
+
+# Activity
+
+def asset_turnover_ratio_year(df, year):
+    revenue = get_value_year(df, 'revenues from sales', year)
+    total_assets = get_value_year(df, 'assets', year)
+    if revenue is not None and total_assets:
+        return revenue / total_assets
+    return None
+
+
+def days_to_sell_inventory_year(df, year):
+    inventory = get_value_year(df, 'inventories', year)
+    revenue = get_value_year(df, 'revenues from sales', year)
+    if inventory is not None and revenue:
+        return int(round((inventory * 360) / revenue))
+    return None
+
+
+def days_sales_outstanding_year(df, year):
+    receivables = get_value_year(df, 'trade receivables', year) or get_value_year(df, 'accounts receivable', year)
+    revenue = get_value_year(df, 'revenues from sales', year) or get_value_year(df, 'sales revenue', year)
+    if receivables is not None and revenue:
+        return int(round((receivables * 360) / revenue))
+    return None
+
+
+def days_payable_outstanding_year(df, year):
+    payables = get_value_year(df, 'trade payables', year) or get_value_year(df, 'accounts payable', year)
+    revenue = get_value_year(df, 'revenues from sales', year) or get_value_year(df, 'sales revenue', year)
+    if payables is not None and revenue:
+        return int(round((payables * 360) / revenue))
+    return None
+
+
+def all_activity_ratios_year(df, year):
+    return {
+        'Asset Turnover Ratio': asset_turnover_ratio_year(df, year),
+        'Days to Sell Inventory': days_to_sell_inventory_year(df, year),
+        'Days Sales Outstanding': days_sales_outstanding_year(df, year),
+        'Days Payable Outstanding': days_payable_outstanding_year(df, year)
+    }
+
+
+# Returns
+
+def return_on_sales_year(df, year):
+    net_income = get_value_year(df, 'net profit/loss', year)
+    revenue = get_value_year(df, 'revenues from sales', year) or get_value_year(df, 'sales revenue', year)
+    if net_income is not None and revenue:
+        return net_income / revenue
+    return None
+
+
+def return_on_assets_year(df, year):
+    net_income = get_value_year(df, 'net profit/loss', year)
+    total_assets = get_value_year(df, 'assets', year)
+    if net_income is not None and total_assets:
+        return net_income / total_assets
+    return None
+
+
+# Return on Equity (ROE) = Net profit / Equity
+def return_on_equity_year(df, year):
+    net_income = get_value_year(df, 'net profit/loss', year)
+    equity = get_value_year(df, 'equity shareholders of the parent', year) or get_value_year(df, 'equity', year)
+    if net_income is not None and equity and equity != 0:
+        return net_income / equity
+    return None
+
+
+def all_return_ratios_year(df, year):
+    return {
+        'Return on Sales (ROS)': return_on_sales_year(df, year),
+        'Return on Assets (ROA)': return_on_assets_year(df, year),
+        'Return on Equity (ROE)': return_on_equity_year(df, year),
+    }
+
+
+# Financial leverage
+
+def debt_to_equity_year(df, year):
+    current_liabilities = get_value_year(df, 'current liabilities', year) or 0
+    non_current_liabilities = get_value_year(df, 'non-current liabilities', year) or 0
+    total_liabilities = current_liabilities + non_current_liabilities
+
+    equity = get_value_year(df, 'equity shareholders of the parent', year) or get_value_year(df, 'equity', year)
+    if total_liabilities is not None and equity and equity != 0:
+        return total_liabilities / equity
+    return None
+
+
+# Equity to Fixed Assets Ratio = Equity / Fixed assets
+def equity_to_fixed_assets_year(df, year):
+    equity = get_value_year(df, 'equity shareholders of the parent', year) or get_value_year(df, 'equity', year)
+    fixed_assets = get_value_year(df, 'non-current assets', year)
+    if equity is not None and fixed_assets and fixed_assets != 0:
+        return equity / fixed_assets
+    return None
+
+
+# Interest Coverage Ratio = Operating income / Interest expenses
+def interest_coverage_year(df, year):
+    operating_income = get_value_year(df, 'operating profit/loss', year)
+    interest_expenses = get_value_year(df, 'financial expenses', year) or get_value_year(df, 'finance costs', year)
+    if operating_income is not None and interest_expenses and interest_expenses != 0:
+        return operating_income / interest_expenses
+    return None
+
+
+# Corrected ROA = (Net profit + Interests * (1 + 0.19)) / Total assets
+def corrected_roa_year(df, year):
+    net_profit = get_value_year(df, 'net profit/loss', year)
+    interests = get_value_year(df, 'financial expenses', year) or get_value_year(df, 'finance costs', year)
+    total_assets = get_value_year(df, 'assets', year)
+
+    if net_profit is not None and interests is not None and total_assets and total_assets != 0:
+        return (net_profit + (+interests * (1 + 0.19))) / total_assets
+    return None
+
+
+# Equity Financial Leverage (EFL) = ROE - Corrected ROA
+def efl_year(df, year):
+    roe = return_on_equity_year(df, year)
+    corr_roa = corrected_roa_year(df, year)
+    if roe is not None and corr_roa is not None:
+        return roe - corr_roa
+    return None
+
+
+# Aggregate all financial leverage ratios for a single year
+def all_leverage_ratios_year(df, year):
+    return {
+        'Debt to Equity Ratio': debt_to_equity_year(df, year),
+        'Equity to Fixed Assets Ratio': equity_to_fixed_assets_year(df, year),
+        'Interest Coverage Ratio': interest_coverage_year(df, year),
+        'Equity Financial Leverage (EFL)': efl_year(df, year)
+    }
+
+
+def ratios_over_years(df, ratios_year):
+    """
+    Apply a per-year ratio function to every year (column) in the statement.
+    Returns a DataFrame with ratios as rows and years as columns.
+    """
+    per_year = {year: ratios_year(df, year) for year in df.columns}
+    ratio_names = list(next(iter(per_year.values()), {}))
+
+    results = {ratio: [per_year[year].get(ratio, None) for year in df.columns] for ratio in ratio_names}
+    return pd.DataFrame(results, index=df.columns).T
+
+
+def all_vertical_ratios_df(df):
+    return ratios_over_years(df, all_vertical_ratios_year)
+
+
+def all_liquidity_ratios_df(df):
+    return ratios_over_years(df, all_liquidity_ratios_year)
+
+
+def all_activity_ratios_df(df):
+    return ratios_over_years(df, all_activity_ratios_year)
+
+
+def all_return_ratios_df(df):
+    return ratios_over_years(df, all_return_ratios_year)
+
+
+def all_leverage_ratios_df(df):
+    return ratios_over_years(df, all_leverage_ratios_year)
+
+
+def prepare_ratios(df, company_name, category_name):
+    # Make a copy so we don't modify the original
+    df2 = df.copy()
+
+    # Move the index (ratio names) into a column called "ratio_name"
+    df2 = df2.reset_index().rename(columns={"index": "ratio_name"})
+
+    # Add two new columns
+    df2["company"] = company_name
+    df2["category"] = category_name
+
+    # Reorder columns: company | category | ratio_name | 2023 | 2024
+    columns = ["company", "category", "ratio_name"] + [col for col in df2.columns if col not in ["company", "category", "ratio_name"]]
+    df2 = df2[columns]
+
+    return df2
+
+
+def prepare_company_ratios(company_name, ratios_df, activity_df, liquidity_ratios_df, leverage_ratios):
+    profitability_prepared = prepare_ratios(ratios_df, company_name, "profitability")
+    activity_prepared = prepare_ratios(activity_df, company_name, "activity")
+    liquidity_prepared = prepare_ratios(liquidity_ratios_df, company_name, "liquidity")
+    leverage_prepared = prepare_ratios(leverage_ratios, company_name, "leverage")
+
+    company_combined_df = pd.concat([
+        leverage_prepared,
+        liquidity_prepared,
+        activity_prepared,
+        profitability_prepared
+    ], ignore_index=True)
+
+    return company_combined_df
+
+
+def compute_company_ratios(statement, company_name):
+    """All ratio categories for one company, in the layout of *_ratios.xlsx"""
+    company_ratios = prepare_company_ratios(
+        company_name,
+        all_vertical_ratios_df(statement),
+        all_activity_ratios_df(statement),
+        all_liquidity_ratios_df(statement),
+        all_leverage_ratios_df(statement)
+    )
+    # Missing ratios come back as None; store them as NaN floats like the saved workbooks
+    company_ratios[['2023', '2024']] = company_ratios[['2023', '2024']].astype(float)
+    return company_ratios
+
+
+def company_ratios_from_file(filename):
+    """Load a statement workbook and return its ratios"""
+    statement = statement_from_sheet(read_statement_sheet(filename))
+    return compute_company_ratios(statement, company_name_from_filename(filename))
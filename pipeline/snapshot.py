@@ -0,0 +1,110 @@
+"""Binary snapshot of the cleaned master tables.
+
+Parsing master_ratios.xlsx / master_inputs.xlsx dominates a cold start. The
+cleaned frames are pickled under a key made from the workbooks' paths, sizes
+and modification times, so a new server process loads them in milliseconds
+and any change to the workbooks invalidates the snapshot.
+
+    python -m pipeline.snapshot          # pre-warm before `streamlit run app2.py`
+"""
+import argparse
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import time
+
+import pandas as pd
+
+from pipeline.master import load_master_frames
+
+MASTER_FILES = ("master_ratios.xlsx", "master_inputs.xlsx")
+
+# Bump when the cleaning in load_master_frames changes what it returns
+SNAPSHOT_VERSION = 1
+
+CACHE_DIR = os.environ.get("RATIOS_CACHE_DIR", "./.cache")
+
+
+def source_signature(data_dir):
+    """(path, size, mtime_ns) of each master workbook"""
+    signature = []
+    for name in MASTER_FILES:
+        path = os.path.abspath(os.path.join(data_dir, name))
+        stat = os.stat(path)
+        signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def source_key(data_dir):
+    """Short key of the current state of the workbooks (changes whenever either is rewritten)"""
+    return hashlib.sha256(
+        repr((SNAPSHOT_VERSION, pd.__version__, source_signature(data_dir))).encode()
+    ).hexdigest()[:16]
+
+
+def snapshot_path(data_dir, cache_dir=CACHE_DIR):
+    """Snapshot file for the current state of the workbooks in data_dir"""
+    folder_key = hashlib.sha256(os.path.abspath(data_dir).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"master_{folder_key}_{source_key(data_dir)}.pkl")
+
+
+def write_snapshot(frames, path):
+    """Pickle the frames atomically and drop older snapshots of the same folder"""
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(frames, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    folder_prefix = os.path.basename(path).rsplit("_", 1)[0]
+    for old_path in glob.glob(os.path.join(folder, f"{folder_prefix}_*.pkl")):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+def load_master_snapshot(data_dir, cache_dir=CACHE_DIR):
+    """Cleaned (master_df, master_inputs_df), from the snapshot when it is current"""
+    path = snapshot_path(data_dir, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # Unreadable or written by incompatible code: rebuild it below
+        pass
+
+    frames = load_master_frames(data_dir)
+    try:
+        # A workbook replaced while we read it (pipeline.watch) must not be stored under the old key
+        if snapshot_path(data_dir, cache_dir) == path:
+            write_snapshot(frames, path)
+    except OSError:
+        # Read-only deployments still work, just without the snapshot
+        pass
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=os.environ.get("RATIOS_DATA_DIR", "./pipeline"),
+                        help="folder with master_ratios.xlsx and master_inputs.xlsx")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    master_df, master_inputs_df = load_master_snapshot(args.data_dir, args.cache_dir)
+    print(f"{snapshot_path(args.data_dir, args.cache_dir)}: {len(master_df)} ratio rows, "
+          f"{len(master_inputs_df)} input rows ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
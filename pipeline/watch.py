@@ -0,0 +1,264 @@
+"""Watch folder: reprocess new or changed statement workbooks automatically.
+
+Workbooks dropped into the watch folder (same 'YC' layout as BORYSZEW.xlsx)
+are picked up once their size and modification time have not changed for
+`settle` seconds, so a file still being copied is never read. They are parsed
+on a bounded process pool with pipeline.ingest.process_workbook and written
+to the data folder as <company>_inputs.xlsx / <company>_ratios.xlsx, like
+inputs.ipynb and analysis.ipynb. The master tables (master.ipynb) are rewritten
+once per burst of files.
+
+Every workbook is written under a temporary name and renamed into place, so a
+reader sees either the old or the new file, never a partial one. The dashboard
+reloads the master tables when their size or modification time change.
+Deleting a workbook from the watch folder does not remove its company.
+
+    python -m pipeline.watch --watch-dir ./incoming
+    python -m pipeline.watch --watch-dir ./incoming --once     # process what is there and exit
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from pipeline.extract import company_name_from_filename
+from pipeline.ingest import process_workbook
+from pipeline.snapshot import CACHE_DIR, load_master_snapshot
+
+# Seconds a workbook's size and mtime must stay unchanged before it is processed
+SETTLE_SECONDS = 2.0
+
+# Longest a finished company waits for the rest of its burst before the master tables are rewritten
+MAX_MASTER_DELAY = 30.0
+
+
+def scan(folder):
+    """(size, mtime_ns) of every statement workbook in the folder (Excel lock and temp files skipped)"""
+    signatures = {}
+    for path in glob.glob(os.path.join(folder, "*.xlsx")):
+        name = os.path.basename(path)
+        if name.startswith(("~$", ".")):
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signatures[path] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+def write_excel_atomic(df, path):
+    """Write a workbook under a temporary name, then rename it over `path`"""
+    # Hidden and not ending in _ratios.xlsx/_inputs.xlsx: no glob of the folder picks it up
+    folder, name = os.path.split(path)
+    tmp_path = os.path.join(folder, f".{name}.{os.getpid()}.tmp.xlsx")
+    try:
+        df.to_excel(tmp_path, index=False, engine="openpyxl")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def replace_company(master, company_frame):
+    """Master table with one company's rows replaced (or added at the end)"""
+    companies = set(company_frame['company'])
+    if master is None:
+        return company_frame.reset_index(drop=True)
+    return pd.concat([master[~master['company'].isin(companies)], company_frame], ignore_index=True)
+
+
+def _log(message):
+    print(f"{time.strftime('%H:%M:%S')} {message}", flush=True)
+
+
+def _read_master(path):
+    return pd.read_excel(path) if os.path.exists(path) else None
+
+
+class WatchFolder:
+    """Polling watcher feeding changed workbooks through a bounded worker pool"""
+
+    def __init__(self, watch_dir, data_dir, settle=SETTLE_SECONDS, max_workers=2,
+                 cache_dir=CACHE_DIR, reprocess=False, log=_log):
+        self.watch_dir = watch_dir
+        self.data_dir = data_dir
+        self.settle = settle
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.log = log
+
+        # Spawned (not forked) workers, like the dashboard's upload pool
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._candidates = {}     # path -> (signature, first time seen with that signature)
+        self._processed = {}      # path -> signature last processed (successfully or not)
+        self._in_flight = {}      # future -> (path, signature, submitted)
+        self._finished = []       # (inputs_df, ratios_df) waiting for the master rewrite
+        self._first_finished = None
+
+        self._master_ratios = _read_master(os.path.join(data_dir, "master_ratios.xlsx"))
+        self._master_inputs = _read_master(os.path.join(data_dir, "master_inputs.xlsx"))
+
+        if not reprocess:
+            self._skip_up_to_date()
+
+    def _skip_up_to_date(self):
+        """
+        Workbooks already processed: company outputs newer than the workbook itself
+        and the company in both master tables (a daemon stopped before publishing
+        leaves outputs the masters never received).
+        """
+        published = [set(master['company']) if master is not None else set()
+                     for master in (self._master_inputs, self._master_ratios)]
+        for path, signature in scan(self.watch_dir).items():
+            company = company_name_from_filename(path)
+            outputs = [os.path.join(self.data_dir, f"{company}_{kind}.xlsx") for kind in ("inputs", "ratios")]
+            if not all(company in companies for companies in published):
+                continue
+            if all(os.path.exists(output) and os.stat(output).st_mtime_ns >= signature[1] for output in outputs):
+                self._processed[path] = signature
+
+    def poll(self, now=None):
+        """
+        One pass: queue settled workbooks, collect finished ones and rewrite the
+        master tables when a burst is complete. Returns the companies published.
+        """
+        now = time.monotonic() if now is None else now
+        self._queue_settled(now)
+        self._collect(now)
+
+        published = []
+        if self._finished and (not self._in_flight or now - self._first_finished >= MAX_MASTER_DELAY):
+            published = self._publish()
+        return published
+
+    def idle(self):
+        """True when nothing is settling, queued or waiting to be published"""
+        return not (self._candidates or self._in_flight or self._finished)
+
+    def _queue_settled(self, now):
+        current = scan(self.watch_dir)
+        for path in list(self._candidates):
+            if path not in current:
+                del self._candidates[path]
+
+        for path, signature in current.items():
+            if self._processed.get(path) == signature:
+                self._candidates.pop(path, None)
+                continue
+
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[0] != signature:
+                # New or still changing: restart its settle timer
+                self._candidates[path] = (signature, now)
+                continue
+
+            # Bounded queue: at most two workbooks per worker handed to the pool
+            if now - candidate[1] >= self.settle and len(self._in_flight) < 2 * self.max_workers:
+                if any(job[0] == path for job in self._in_flight.values()):
+                    continue
+                future = self._executor.submit(process_workbook, path, os.path.basename(path))
+                self._in_flight[future] = (path, signature, time.perf_counter())
+                del self._candidates[path]
+
+    def _collect(self, now):
+        for future in [future for future in self._in_flight if future.done()]:
+            path, signature, submitted = self._in_flight.pop(future)
+            self._processed[path] = signature
+            try:
+                company, inputs_df, ratios_df, _ = future.result()
+            except Exception as e:
+                self.log(f"failed {os.path.basename(path)}: {e}")
+                continue
+
+            try:
+                write_excel_atomic(inputs_df, os.path.join(self.data_dir, f"{company}_inputs.xlsx"))
+                write_excel_atomic(ratios_df, os.path.join(self.data_dir, f"{company}_ratios.xlsx"))
+            except Exception as e:
+                self.log(f"failed writing {company}: {e}")
+                continue
+            self.log(f"processed {os.path.basename(path)} -> {company} "
+                     f"({time.perf_counter() - submitted:.1f}s)")
+
+            if not self._finished:
+                self._first_finished = now
+            self._finished.append((inputs_df, ratios_df))
+
+    def _publish(self):
+        """
+        Merge the finished companies into the master tables and replace both workbooks.
+        If a write fails the companies stay pending and the next poll tries again.
+        """
+        master_inputs, master_ratios = self._master_inputs, self._master_ratios
+        companies = []
+        for inputs_df, ratios_df in self._finished:
+            master_inputs = replace_company(master_inputs, inputs_df)
+            master_ratios = replace_company(master_ratios, ratios_df)
+            companies.extend(ratios_df['company'].unique())
+
+        # Inputs first: the dashboard reloads on either file, and ratios are what it shows first
+        try:
+            write_excel_atomic(master_inputs, os.path.join(self.data_dir, "master_inputs.xlsx"))
+            write_excel_atomic(master_ratios, os.path.join(self.data_dir, "master_ratios.xlsx"))
+        except Exception as e:
+            self.log(f"failed writing the master tables ({len(companies)} companies pending): {e}")
+            return []
+
+        self._master_inputs, self._master_ratios = master_inputs, master_ratios
+        self._finished = []
+
+        # Pre-warm the dashboard's snapshot so its reload skips the Excel parsing
+        if self.cache_dir:
+            try:
+                load_master_snapshot(self.data_dir, self.cache_dir)
+            except Exception as e:
+                self.log(f"snapshot skipped: {e}")
+
+        self.log(f"published {len(companies)} companies to the master tables")
+        return companies
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--watch-dir", required=True, help="folder the vendor drops statement workbooks into")
+    parser.add_argument("--data-dir", default=os.environ.get("RATIOS_DATA_DIR", "./pipeline"),
+                        help="folder with the per-company and master workbooks the dashboard reads")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between folder scans")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="seconds a workbook must stay unchanged before it is processed")
+    parser.add_argument("--workers", type=int, default=2, help="process pool size")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="dashboard snapshot folder ('' to skip pre-warming)")
+    parser.add_argument("--reprocess", action="store_true", help="process every workbook, even if its outputs are newer")
+    parser.add_argument("--once", action="store_true", help="exit once the workbooks already in the folder are processed")
+    args = parser.parse_args(argv)
+
+    watcher = WatchFolder(args.watch_dir, args.data_dir, settle=args.settle, max_workers=args.workers,
+                          cache_dir=args.cache_dir, reprocess=args.reprocess)
+    _log(f"watching {args.watch_dir} -> {args.data_dir}")
+    try:
+        while True:
+            watcher.poll()
+            if args.once and watcher.idle():
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""Static report packs: one HTML (and optionally PDF) report per company plus a
+portfolio report, rendered in parallel from the dashboard's chart definitions.
+
+    python -m reports --output reports
+    python -m reports --output reports --companies BORYSZEW FASING --pdf
+
+Each worker process loads the master tables once (pool initializer); page
+templates and the report layout are built once at import. Figures are
+embedded without plotly.js, which is written once next to the reports.
+PDF export needs the optional kaleido package (see requirements.txt); --pdf
+fails without it.
+"""
+import argparse
+import html
+import os
+import re
+import string
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from plotly.subplots import make_subplots
+
+import charts
+from cube import MasterCube
+from pipeline.master import load_master_frames, compact_master_frames
+
+PAGE_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<script src="$plotlyjs"></script>
+<style>
+body { font-family: Arial, sans-serif; margin: 2rem auto; max-width: 1100px; color: #333; }
+h1 { color: #1f77b4; border-bottom: 2px solid #1f77b4; padding-bottom: 0.5rem; }
+h2 { color: #2c3e50; margin-top: 2rem; }
+table { border-collapse: collapse; margin: 1rem 0; }
+th, td { border: 1px solid #ddd; padding: 0.35rem 0.75rem; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.alert { background-color: #fff3cd; border-left: 4px solid #ffc107; padding: 0.5rem 1rem; margin: 0.5rem 0; }
+.footer { margin-top: 3rem; color: #888; font-size: 0.85rem; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+$body
+<p class="footer">Generated $generated from $source</p>
+</body>
+</html>
+""")
+SECTION_TEMPLATE = string.Template("<section>\n<h2>$heading</h2>\n$content\n</section>\n")
+
+# Plotly template of report figures (set as the worker default: updating each figure's template is slow)
+REPORT_TEMPLATE = "plotly_white"
+
+# Layout applied to every report figure (fixed width: reports are not responsive)
+REPORT_LAYOUT = {'width': 1000, 'font': {'size': 12}}
+
+KEY_RATIOS = [
+    'Current Ratio', 'Quick Ratio', 'Cash Holdings Ratio', 'Debt to Equity Ratio', 'Equity Ratio',
+    'Interest Coverage Ratio', 'Gross Margin', 'Operating Margin', 'Net Profit Margin',
+    'Asset Turnover Ratio',
+]
+
+# Dashboard alert rules (see the Executive Summary section of app2.py)
+ALERTS = [
+    ('Interest Coverage Ratio', lambda v: v < 0, "Negative interest coverage"),
+    ('Current Ratio', lambda v: v < 1.2, "Low current ratio"),
+    ('Net Profit Margin', lambda v: v < 0, "Negative net margin"),
+]
+
+PERCENT_RATIOS = {'Cash Holdings Ratio', 'Equity Ratio', 'Gross Margin', 'Operating Margin', 'Net Profit Margin'}
+
+# Per-process dataset, filled by init_worker
+_data = {}
+
+
+def init_worker(data_dir, color_scheme="Corporate"):
+    """Pool initializer: load the master tables and build the cubes once per worker"""
+    pio.templates.default = REPORT_TEMPLATE
+    master_df, master_inputs_df = compact_master_frames(*load_master_frames(data_dir))
+    ratio_cube = MasterCube.from_frame(master_df, 'ratio_name')
+    inputs_cube = MasterCube.from_frame(master_inputs_df, 'item')
+    _data.update(
+        source=os.path.abspath(data_dir),
+        ratio_cube=ratio_cube,
+        inputs_cube=inputs_cube,
+        colors=charts.company_color_map(color_scheme, ratio_cube.companies),
+    )
+
+
+def safe_filename(name):
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('_') or 'company'
+
+
+def format_value(ratio, value):
+    if value is None or np.isnan(value):
+        return "–"
+    return f"{value:.1%}" if ratio in PERCENT_RATIOS else f"{value:,.2f}"
+
+
+def ratio_table(ratio_cube, companies, year='2024', previous_year='2023'):
+    """HTML table of the key ratios (one row per ratio, one column pair per company): company pages"""
+    header = "".join(f"<th>{html.escape(c)} {previous_year}</th><th>{html.escape(c)} {year}</th>"
+                     for c in companies)
+    rows = []
+    for ratio in KEY_RATIOS:
+        cells = "".join(
+            f"<td>{format_value(ratio, ratio_cube.value(c, ratio, previous_year))}</td>"
+            f"<td>{format_value(ratio, ratio_cube.value(c, ratio, year))}</td>"
+            for c in companies
+        )
+        rows.append(f"<tr><td>{html.escape(ratio)}</td>{cells}</tr>")
+    return f"<table>\n<tr><th>Ratio</th>{header}</tr>\n" + "\n".join(rows) + "\n</table>"
+
+
+def portfolio_table(ratio_cube, companies, year='2024'):
+    """HTML table of the key ratios with one row per company, so it stays readable for large packs"""
+    header = "".join(f"<th>{html.escape(ratio)}</th>" for ratio in KEY_RATIOS)
+    rows = []
+    for company in companies:
+        cells = "".join(f"<td>{format_value(ratio, ratio_cube.value(company, ratio, year))}</td>"
+                        for ratio in KEY_RATIOS)
+        rows.append(f"<tr><td>{html.escape(company)}</td>{cells}</tr>")
+    return f"<table>\n<tr><th>Company ({year})</th>{header}</tr>\n" + "\n".join(rows) + "\n</table>"
+
+
+def alert_list(ratio_cube, companies, year='2024'):
+    alerts = []
+    for company in companies:
+        for ratio, breached, message in ALERTS:
+            value = ratio_cube.value(company, ratio, year)
+            if value is not None and breached(value):
+                alerts.append(f'<div class="alert">{html.escape(company)}: {message} '
+                              f'({format_value(ratio, value)})</div>')
+    return "\n".join(alerts) or "<p>No alerts.</p>"
+
+
+def company_figures(company, years=('2024', '2023')):
+    """(heading, figure) pairs of a single-company report"""
+    ratio_cube, inputs_cube, colors = _data['ratio_cube'], _data['inputs_cube'], _data['colors']
+    figures = [
+        ("Profitability", charts.profitability_chart(ratio_cube, [company], colors, years)),
+        ("Liquidity", charts.liquidity_chart(ratio_cube, [company], colors)),
+        ("Leverage", charts.leverage_chart(ratio_cube, [company], colors)),
+        ("Asset Structure", charts.asset_structure_chart(ratio_cube, [company])),
+        ("Financing Structure", charts.financing_structure_chart(ratio_cube, [company])),
+    ]
+    if company in inputs_cube.company_index:
+        figures.append(("Cash Flow", charts.cash_flow_waterfall(inputs_cube, company)))
+    return [(heading, fig) for heading, fig in figures if fig is not None]
+
+
+def portfolio_figures(companies, years=('2024', '2023')):
+    """(heading, figure) pairs comparing every company in the pack"""
+    ratio_cube, colors = _data['ratio_cube'], _data['colors']
+    figures = [
+        ("Profitability", charts.profitability_chart(ratio_cube, companies, colors, years)),
+        ("Liquidity", charts.liquidity_chart(ratio_cube, companies, colors)),
+        ("Leverage", charts.leverage_chart(ratio_cube, companies, colors)),
+        ("Asset Structure", charts.asset_structure_chart(ratio_cube, companies)),
+        ("Financing Structure", charts.financing_structure_chart(ratio_cube, companies)),
+    ]
+    return [(heading, fig) for heading, fig in figures if fig is not None]
+
+
+def render_html(title, tables, figures, plotlyjs="plotly.min.js"):
+    """Full page: tables as (heading, html), figures as (heading, figure)"""
+    sections = [SECTION_TEMPLATE.substitute(heading=heading, content=content) for heading, content in tables]
+    for heading, fig in figures:
+        fig.update_layout(REPORT_LAYOUT)
+        sections.append(SECTION_TEMPLATE.substitute(
+            heading=heading,
+            content=fig.to_html(full_html=False, include_plotlyjs=False)
+        ))
+    return PAGE_TEMPLATE.substitute(
+        title=html.escape(title),
+        body="".join(sections),
+        plotlyjs=plotlyjs,
+        generated=time.strftime("%Y-%m-%d %H:%M"),
+        source=html.escape(_data['source']),
+    )
+
+
+def pdf_available():
+    try:
+        import kaleido  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def render_pdf(title, figures, path):
+    """One-page PDF: every figure's traces laid out on a two-column grid (needs kaleido)"""
+    n_rows = -(-len(figures) // 2)
+    page = make_subplots(rows=n_rows, cols=2, subplot_titles=[heading for heading, _ in figures])
+    shown = set()
+    for i, (_, fig) in enumerate(figures):
+        for trace in fig.data:
+            if not isinstance(trace, (go.Bar, go.Scatter, go.Waterfall)):
+                continue
+            # One legend entry per company/type across the page
+            trace.showlegend = trace.name not in shown and bool(trace.name)
+            shown.add(trace.name)
+            page.add_trace(trace, row=i // 2 + 1, col=i % 2 + 1)
+    page.update_layout(REPORT_LAYOUT, title=title, height=350 * n_rows, width=1100, barmode='group')
+    page.write_image(path, format="pdf")
+
+
+def render_company(company, output_dir, pdf=False):
+    """Worker task: write one company's report; returns a result record"""
+    start = time.perf_counter()
+    ratio_cube = _data['ratio_cube']
+    name = safe_filename(company)
+    result = {'report': company, 'html': None, 'pdf': None, 'error': None}
+    try:
+        page = render_html(
+            f"{company} – Financial Ratios Report",
+            [("Key Ratios", ratio_table(ratio_cube, [company])),
+             ("Alerts", alert_list(ratio_cube, [company]))],
+            company_figures(company),
+            plotlyjs="../plotly.min.js",
+        )
+        result['html'] = os.path.join(output_dir, "companies", f"{name}.html")
+        with open(result['html'], "w", encoding="utf-8") as f:
+            f.write(page)
+
+        if pdf:
+            result['pdf'] = os.path.join(output_dir, "companies", f"{name}.pdf")
+            # Faceted charts do not fit a grid cell: the PDF shows the latest year only
+            render_pdf(f"{company} – Financial Ratios Report", company_figures(company, years=('2024',)),
+                       result['pdf'])
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def render_portfolio(companies, output_dir, pdf=False):
+    """Worker task: write the portfolio report comparing all companies"""
+    start = time.perf_counter()
+    ratio_cube = _data['ratio_cube']
+    result = {'report': 'portfolio', 'html': None, 'pdf': None, 'error': None}
+    try:
+        links = "<ul>\n" + "\n".join(
+            f'<li><a href="companies/{safe_filename(c)}.html">{html.escape(c)}</a></li>' for c in companies
+        ) + "\n</ul>"
+        page = render_html(
+            "Portfolio – Financial Ratios Report",
+            [("Company Reports", links),
+             ("Key Ratios", portfolio_table(ratio_cube, companies)),
+             ("Alerts", alert_list(ratio_cube, companies))],
+            portfolio_figures(companies),
+        )
+        result['html'] = os.path.join(output_dir, "index.html")
+        with open(result['html'], "w", encoding="utf-8") as f:
+            f.write(page)
+
+        if pdf:
+            result['pdf'] = os.path.join(output_dir, "portfolio.pdf")
+            render_pdf("Portfolio – Financial Ratios Report", portfolio_figures(companies, years=('2024',)),
+                       result['pdf'])
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def generate_reports(data_dir, output_dir, companies=None, pdf=False, color_scheme="Corporate", max_workers=None):
+    """Render the portfolio report and every company report; returns the result records"""
+    if pdf and not pdf_available():
+        raise RuntimeError("PDF reports need the kaleido package (pip install kaleido)")
+
+    # Company list from a local load; the workers load their own copy
+    init_worker(data_dir, color_scheme)
+    companies = list(companies or _data['ratio_cube'].companies)
+    unknown = [c for c in companies if c not in _data['ratio_cube'].company_index]
+    if unknown:
+        raise ValueError(f"Unknown companies: {unknown}")
+
+    os.makedirs(os.path.join(output_dir, "companies"), exist_ok=True)
+    with open(os.path.join(output_dir, "plotly.min.js"), "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+
+    # Spawned (not forked) workers, each initialized with its own dataset
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_worker, initargs=(data_dir, color_scheme)) as pool:
+        futures = [pool.submit(render_portfolio, companies, output_dir, pdf)]
+        futures += [pool.submit(render_company, company, output_dir, pdf) for company in companies]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=os.environ.get("RATIOS_DATA_DIR", "./pipeline"),
+                        help="folder with master_ratios.xlsx and master_inputs.xlsx")
+    parser.add_argument("--output", default="reports", help="output folder")
+    parser.add_argument("--companies", nargs="+", help="companies to report on (default: all)")
+    parser.add_argument("--pdf", action="store_true", help="also write PDFs (needs kaleido)")
+    parser.add_argument("--color-scheme", default="Corporate", choices=list(charts.COLOR_SCHEMES))
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    args = parser.parse_args(argv)
+    if args.pdf and not pdf_available():
+        parser.error("--pdf needs the kaleido package (pip install kaleido)")
+
+    start = time.perf_counter()
+    results = generate_reports(args.data_dir, args.output, args.companies, args.pdf,
+                               args.color_scheme, args.workers)
+    failed = [r for r in results if r['error']]
+    for result in failed:
+        print(f"{result['report']}: {result['error']}", file=sys.stderr)
+    print(f"{len(results) - len(failed)} reports written to {args.output} "
+          f"in {time.perf_counter() - start:.1f}s ({len(failed)} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
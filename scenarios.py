@@ -0,0 +1,289 @@
+"""Batched what-if evaluation of ratios and alerts under input shocks.
+
+A scenario is a set of shocks to a company's input items (revenue, gross
+margin, payable/receivable/inventory days, or any item by a factor). Shocked
+items are held as scenario × company arrays and every ratio and alert is
+computed from them with array arithmetic, so thousands of scenarios cost one
+pass rather than a Python loop over the per-company ratio functions.
+
+With no shock the formulas reproduce the stored ratios; check it against the
+master tables with
+
+    python -m scenarios
+"""
+import argparse
+import itertools
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Input items the vectorized formulas read (master_inputs 'item' names)
+ITEMS = [
+    'total_assets', 'non_current_assets', 'current_assets', 'inventory',
+    'trade_receivables', 'cash_and_equivalents', 'equity',
+    'non_current_liabilities', 'current_liabilities', 'trade_payables',
+    'revenue', 'gross_profit', 'operating_profit', 'profit_before_tax',
+    'net_profit', 'financial_expenses',
+]
+
+# Tax rate used to pass pre-tax changes through to net profit (as in the corrected ROA)
+TAX_RATE = 0.19
+
+# Day-count convention of the activity ratios in analysis.ipynb
+DAYS_IN_YEAR = 360
+
+# Dashboard alerts: (label, ratio, threshold) -- an alert fires when ratio < threshold
+ALERT_RULES = [
+    ("Negative Interest Coverage", 'Interest Coverage Ratio', 0.0),
+    ("Low Current Ratio", 'Current Ratio', 1.2),
+    ("Negative Net Margin", 'Net Profit Margin', 0.0),
+]
+
+SHOCKS = ['revenue', 'gross_margin', 'payable_days', 'receivable_days', 'inventory_days']
+
+# Bump when evaluate_ratios changes what it returns (cached stress results are keyed on it)
+FORMULA_VERSION = 2
+
+
+def base_items(inputs_cube, companies, year, ratio_cube=None):
+    """
+    company × item matrix of the inputs the formulas need (NaN where missing).
+
+    Workbooks extracted before 'financial expenses' was a standard item have no
+    interest line; given the ratio cube, it is backed out of the reported
+    Interest Coverage Ratio (operating profit / financial expenses).
+    """
+    values = np.full((len(companies), len(ITEMS)), np.nan)
+    company_idx = [inputs_cube.company_index[company] for company in companies]
+    year_idx = inputs_cube.year_index[year]
+
+    for j, item in enumerate(ITEMS):
+        if item in inputs_cube.item_index:
+            values[:, j] = inputs_cube.values[company_idx, inputs_cube.item_index[item], year_idx]
+
+    if ratio_cube is not None and 'Interest Coverage Ratio' in ratio_cube.item_index:
+        coverage = np.array([
+            ratio_cube.value(company, 'Interest Coverage Ratio', year) if company in ratio_cube.company_index
+            else None for company in companies
+        ], dtype=float)
+        operating_profit = values[:, ITEMS.index('operating_profit')]
+        interest = ITEMS.index('financial_expenses')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            implied = np.where(coverage != 0, operating_profit / coverage, np.nan)
+        values[:, interest] = np.where(np.isnan(values[:, interest]), implied, values[:, interest])
+    return values
+
+
+def scenario_grid(**shock_values):
+    """
+    Cartesian product of shock values, one scenario per combination.
+    Keyword names are SHOCKS (revenue and gross_margin as fractions, the
+    others in days); shocks that are not given stay at 0.
+    Returns a DataFrame with one row per scenario.
+    """
+    unknown = set(shock_values) - set(SHOCKS)
+    if unknown:
+        raise ValueError(f"Unknown shocks: {sorted(unknown)}")
+
+    axes = [np.atleast_1d(np.asarray(shock_values.get(shock, [0.0]), dtype=float)) for shock in SHOCKS]
+    return pd.DataFrame(list(itertools.product(*axes)), columns=SHOCKS)
+
+
+def apply_shocks(base, shocks, item_factors=None):
+    """
+    Shocked items as {item: scenario × company array}.
+
+    base: company × item matrix from base_items
+    shocks: DataFrame/dict of per-scenario arrays for each name in SHOCKS
+    item_factors: optional scenario × item multiplicative factors applied first
+    """
+    def shock(name):
+        return np.asarray(shocks[name], dtype=float)[:, None]
+
+    items = {item: np.broadcast_to(base[:, j], (len(shocks[SHOCKS[0]]), base.shape[0])).copy()
+             for j, item in enumerate(ITEMS)}
+    if item_factors is not None:
+        for j, item in enumerate(ITEMS):
+            items[item] *= np.asarray(item_factors)[:, j][:, None]
+
+    # Revenue: cost of sales moves with revenue (constant gross margin), overheads do not
+    revenue_change = shock('revenue')
+    gross_change = items['gross_profit'] * revenue_change
+    items['revenue'] = items['revenue'] * (1 + revenue_change)
+
+    # Gross margin shift in percentage points of the shocked revenue
+    gross_change = gross_change + items['revenue'] * shock('gross_margin')
+
+    items['gross_profit'] = items['gross_profit'] + gross_change
+    items['operating_profit'] = items['operating_profit'] + gross_change
+    items['profit_before_tax'] = items['profit_before_tax'] + gross_change
+    items['net_profit'] = items['net_profit'] + gross_change * (1 - TAX_RATE)
+
+    # Working capital: days of revenue (or cost of sales) moved between cash and the item
+    daily_revenue = items['revenue'] / DAYS_IN_YEAR
+    daily_cost = (items['revenue'] - items['gross_profit']) / DAYS_IN_YEAR
+
+    payables_change = daily_revenue * shock('payable_days')
+    items['trade_payables'] = items['trade_payables'] + payables_change
+    items['current_liabilities'] = items['current_liabilities'] + payables_change
+    items['current_assets'] = items['current_assets'] + payables_change
+    items['total_assets'] = items['total_assets'] + payables_change
+
+    receivables_change = daily_revenue * shock('receivable_days')
+    inventory_change = daily_cost * shock('inventory_days')
+    items['trade_receivables'] = items['trade_receivables'] + receivables_change
+    items['inventory'] = items['inventory'] + inventory_change
+
+    items['cash_and_equivalents'] = (
+        items['cash_and_equivalents'] + payables_change - receivables_change - inventory_change
+    )
+    return items
+
+
+def _divide(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def evaluate_ratios(items):
+    """All input-derived ratios as {ratio_name: scenario × company array}"""
+    total_assets = items['total_assets']
+    revenue = items['revenue']
+    equity = items['equity']
+    current_liabilities = items['current_liabilities']
+
+    return {
+        'Current Ratio': _divide(items['current_assets'], current_liabilities),
+        # As stored: the notebook looks up 'inventory' (the item is 'inventories'), so nothing is deducted
+        'Quick Ratio': _divide(items['current_assets'], current_liabilities),
+        'Cash Holdings Ratio': _divide(items['cash_and_equivalents'], total_assets),
+        'Working Capital': items['current_assets'] - current_liabilities,
+        'Debt to Equity Ratio': _divide(np.nan_to_num(current_liabilities) + np.nan_to_num(items['non_current_liabilities']), equity),
+        'Equity Ratio': _divide(equity, total_assets),
+        # Sign as stored (financial expenses keep the statement's sign), so the alerts,
+        # the stress test and the dashboard read the same value
+        'Interest Coverage Ratio': _divide(items['operating_profit'], items['financial_expenses']),
+        'Gross Margin': _divide(items['gross_profit'], revenue),
+        'Operating Margin': _divide(items['operating_profit'], revenue),
+        'EBIT Margin': _divide(items['profit_before_tax'], revenue),
+        'Net Profit Margin': _divide(items['net_profit'], revenue),
+        'Return on Assets (ROA)': _divide(items['net_profit'], total_assets),
+        'Return on Equity (ROE)': _divide(items['net_profit'], equity),
+        'Asset Turnover Ratio': _divide(revenue, total_assets),
+        # Whole days, rounded like the stored ratios
+        'Days Sales Outstanding': np.round(_divide(items['trade_receivables'] * DAYS_IN_YEAR, revenue)),
+        'Days to Sell Inventory': np.round(_divide(items['inventory'] * DAYS_IN_YEAR, revenue)),
+        'Days Payable Outstanding': np.round(_divide(items['trade_payables'] * DAYS_IN_YEAR, revenue)),
+    }
+
+
+def evaluate_alerts(ratios, rules=ALERT_RULES):
+    """{alert label: scenario × company boolean array}"""
+    return {label: ratios[ratio] < threshold for label, ratio, threshold in rules}
+
+
+def run_scenarios(inputs_cube, companies, year, shocks, ratio_cube=None, chunk_size=256):
+    """
+    Evaluate every scenario for every company and summarize.
+
+    Companies are processed in chunks so memory stays bounded for large
+    selections. Returns a dict with:
+      'baseline'     company × ratio DataFrame of unshocked values
+      'worst'        company × ratio DataFrame of the worst value across scenarios
+                     (lowest, or highest for lower-is-better ratios)
+      'alert_share'  company × alert DataFrame: share of scenarios firing the alert
+    """
+    from trends import ratio_direction
+
+    shocks = pd.DataFrame(shocks)
+    baseline_shock = pd.DataFrame({name: [0.0] for name in SHOCKS})
+
+    baseline_rows, worst_rows, alert_rows = [], [], []
+
+    for start in range(0, len(companies), chunk_size):
+        chunk = companies[start:start + chunk_size]
+        base = base_items(inputs_cube, chunk, year, ratio_cube)
+
+        ratios = evaluate_ratios(apply_shocks(base, shocks))
+        baseline = evaluate_ratios(apply_shocks(base, baseline_shock))
+        alerts = evaluate_alerts(ratios)
+
+        worst = {}
+        for ratio, values in ratios.items():
+            direction = ratio_direction(ratio) or 1
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns stay NaN
+                worst[ratio] = np.nanmin(values * direction, axis=0) * direction
+
+        baseline_rows.append(pd.DataFrame({ratio: values[0] for ratio, values in baseline.items()}, index=chunk))
+        worst_rows.append(pd.DataFrame(worst, index=chunk))
+        alert_rows.append(pd.DataFrame({label: fired.mean(axis=0) for label, fired in alerts.items()}, index=chunk))
+
+    return {
+        'baseline': pd.concat(baseline_rows),
+        'worst': pd.concat(worst_rows),
+        'alert_share': pd.concat(alert_rows),
+    }
+
+
+def company_scenarios(inputs_cube, company, year, shocks, ratio_cube=None):
+    """One row per scenario for a single company: shocks, every ratio and every alert"""
+    shocks = pd.DataFrame(shocks).reset_index(drop=True)
+    ratios = evaluate_ratios(apply_shocks(base_items(inputs_cube, [company], year, ratio_cube), shocks))
+    alerts = evaluate_alerts(ratios)
+    return pd.concat([
+        shocks,
+        pd.DataFrame({ratio: values[:, 0] for ratio, values in ratios.items()}),
+        pd.DataFrame({label: fired[:, 0] for label, fired in alerts.items()}),
+    ], axis=1)
+
+
+def baseline_mismatches(inputs_cube, ratio_cube, year, rtol=1e-9):
+    """
+    Stored ratios the zero-shock scenario does not reproduce, as a DataFrame
+    (company | ratio | stored | scenario); empty when every value matches.
+    """
+    companies = [company for company in inputs_cube.companies if company in ratio_cube.company_index]
+    baseline = run_scenarios(inputs_cube, companies, year, scenario_grid(), ratio_cube)['baseline']
+
+    rows = []
+    for ratio in baseline.columns:
+        if ratio not in ratio_cube.item_index:
+            continue
+        for company, value in baseline[ratio].items():
+            stored = ratio_cube.value(company, ratio, year)
+            if stored is not None and not np.isclose(value, stored, rtol=rtol, equal_nan=True):
+                rows.append({'company': company, 'ratio': ratio, 'stored': stored, 'scenario': value})
+    return pd.DataFrame(rows, columns=['company', 'ratio', 'stored', 'scenario'])
+
+
+def main(argv=None):
+    from cube import MasterCube
+    from pipeline.master import load_master_frames, compact_master_frames
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=os.environ.get("RATIOS_DATA_DIR", "./pipeline"),
+                        help="folder with master_ratios.xlsx and master_inputs.xlsx")
+    args = parser.parse_args(argv)
+
+    master_df, master_inputs_df = compact_master_frames(*load_master_frames(args.data_dir))
+    inputs_cube = MasterCube.from_frame(master_inputs_df, 'item')
+    ratio_cube = MasterCube.from_frame(master_df, 'ratio_name')
+
+    failed = False
+    for year in inputs_cube.years:
+        mismatches = baseline_mismatches(inputs_cube, ratio_cube, year)
+        if len(mismatches):
+            failed = True
+            print(f"{year}: {len(mismatches)} stored ratios differ from the zero-shock scenario")
+            print(mismatches.to_string(index=False))
+        else:
+            print(f"{year}: zero-shock scenario matches the stored ratios of {len(inputs_cube.companies)} companies")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
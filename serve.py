@@ -0,0 +1,118 @@
+"""Start the dashboard with a pre-warmed data cache and a readiness marker.
+
+Streamlit only runs app2.py when a browser session connects, so the app
+cannot report readiness to a probe by itself. This launcher removes the
+previous marker, pre-warms the master-table snapshot (pipeline/snapshot.py),
+starts `streamlit run app2.py` and writes the marker (RATIOS_READY_FILE,
+default .cache/ready) once the server answers its health check. The marker
+is removed again when the server exits.
+
+    python -m serve                             # instead of `streamlit run app2.py`
+    python -m serve -- --server.address 0.0.0.0 # arguments after -- go to streamlit
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from pipeline.snapshot import CACHE_DIR, load_master_snapshot, source_key
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app2.py")
+
+# Seconds the server may take to answer /_stcore/health before the launch counts as failed
+START_TIMEOUT = 120.0
+
+
+def ready_file(cache_dir):
+    return os.environ.get("RATIOS_READY_FILE", os.path.join(cache_dir, "ready"))
+
+
+def remove_marker(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def write_marker(path, status):
+    """Write the marker under a temporary name, then rename it into place"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def server_healthy(port):
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=2) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=os.environ.get("RATIOS_DATA_DIR", "./pipeline"),
+                        help="folder with master_ratios.xlsx and master_inputs.xlsx")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--timeout", type=float, default=START_TIMEOUT,
+                        help="seconds to wait for the server's health check")
+    parser.add_argument("streamlit_args", nargs=argparse.REMAINDER, help="extra `streamlit run` arguments after --")
+    args = parser.parse_args(argv)
+    streamlit_args = [arg for arg in args.streamlit_args if arg != "--"]
+
+    marker = ready_file(args.cache_dir)
+    started = time.time()
+
+    # Whatever an earlier process left behind says nothing about this one
+    remove_marker(marker)
+
+    master_df, master_inputs_df = load_master_snapshot(args.data_dir, args.cache_dir)
+    print(f"snapshot ready: {len(master_df)} ratio rows, {len(master_inputs_df)} input rows "
+          f"({time.time() - started:.2f}s)", flush=True)
+
+    env = dict(os.environ, RATIOS_DATA_DIR=args.data_dir, RATIOS_CACHE_DIR=args.cache_dir)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH,
+         "--server.port", str(args.port), "--server.headless", "true", *streamlit_args],
+        env=env,
+    )
+
+    # Orchestrators stop containers with SIGTERM: exit through the finally below
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    try:
+        deadline = time.monotonic() + args.timeout
+        while not server_healthy(args.port):
+            if server.poll() is not None:
+                return server.returncode or 1
+            if time.monotonic() > deadline:
+                print(f"server did not answer /_stcore/health within {args.timeout:.0f}s", file=sys.stderr)
+                return 1
+            time.sleep(0.2)
+
+        write_marker(marker, {
+            'status': 'ready', 'pid': server.pid, 'started': started, 'ready': time.time(),
+            'data_version': source_key(args.data_dir),
+        })
+        print(f"ready after {time.time() - started:.2f}s ({marker})", flush=True)
+        return server.wait()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        remove_marker(marker)
+        if server.poll() is None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
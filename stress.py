@@ -0,0 +1,210 @@
+"""Monte Carlo stress test: probability of breaching the critical thresholds.
+
+Each path draws correlated shocks to revenue, gross margin and the working
+capital days (see scenarios.SHOCKS) and applies them to a company's inputs
+with scenarios.apply_shocks. Paths are simulated in vectorized batches across
+a process pool; every batch has its own child of one SeedSequence, so results
+do not depend on the number of workers. Results are cached on disk under a
+hash of the inputs and parameters.
+
+    python -m stress --paths 100000          # precompute for the master tables
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scenarios import SHOCKS, ITEMS, FORMULA_VERSION, base_items, apply_shocks, evaluate_ratios
+
+# Critical warnings from the readme: (label, ratio, breach when above?, threshold)
+BREACH_RULES = [
+    ("Current Ratio < 1.0", 'Current Ratio', False, 1.0),
+    ("Quick Ratio < 0.5", 'Quick Ratio', False, 0.5),
+    ("Debt to Equity > 2.0", 'Debt to Equity Ratio', True, 2.0),
+    ("Interest Coverage < 1.5", 'Interest Coverage Ratio', False, 1.5),
+    ("Negative Net Margin", 'Net Profit Margin', False, 0.0),
+]
+ANY_BREACH = "Any breach"
+
+# One-year shock volatilities (revenue and gross margin as fractions, the rest in days)
+SHOCK_VOLATILITY = {
+    'revenue': 0.15,
+    'gross_margin': 0.03,
+    'payable_days': 10.0,
+    'receivable_days': 10.0,
+    'inventory_days': 10.0,
+}
+
+# Correlations in SHOCKS order: in a downturn margins compress, customers pay
+# later, stock builds up and the company leans on its suppliers
+SHOCK_CORRELATION = np.array([
+    # revenue  margin  payable  receivable  inventory
+    [1.0,      0.5,    -0.3,    -0.4,       -0.5],
+    [0.5,      1.0,    -0.2,    -0.2,       -0.3],
+    [-0.3,     -0.2,   1.0,     0.3,        0.3],
+    [-0.4,     -0.2,   0.3,     1.0,        0.3],
+    [-0.5,     -0.3,   0.3,     0.3,        1.0],
+])
+
+CACHE_DIR = os.environ.get("RATIOS_CACHE_DIR", "./.cache")
+
+# Paths × companies evaluated at once by a worker (bounds its memory)
+BATCH_ELEMENTS = 500_000
+
+
+def shock_scale(volatility=None, correlation=None):
+    """Matrix turning independent standard normals into correlated shocks"""
+    volatility = {**SHOCK_VOLATILITY, **(volatility or {})}
+    correlation = SHOCK_CORRELATION if correlation is None else np.asarray(correlation, dtype=float)
+    # Raises LinAlgError if the correlation matrix is not positive definite
+    cholesky = np.linalg.cholesky(correlation)
+    return cholesky * np.array([volatility[shock] for shock in SHOCKS])[:, None]
+
+
+def breach_counts(base, shocks):
+    """Number of paths breaching each rule (company × rule) and breaching any rule (company,)"""
+    items = apply_shocks(base, shocks)
+    ratios = evaluate_ratios(items)
+
+    breached = np.stack([
+        ratios[ratio] > threshold if above else ratios[ratio] < threshold
+        for _, ratio, above, threshold in BREACH_RULES
+    ], axis=2)
+    return breached.sum(axis=0), breached.any(axis=2).sum(axis=0)
+
+
+def _simulate_batch(base, seed, n_paths, scale):
+    """Worker: one batch of paths for a block of companies"""
+    rng = np.random.default_rng(seed)
+    draws = rng.standard_normal((n_paths, len(SHOCKS))) @ scale.T
+    shocks = {shock: draws[:, j] for j, shock in enumerate(SHOCKS)}
+    return breach_counts(base, shocks)
+
+
+def simulate(base, companies, n_paths=100_000, batch_size=10_000, seed=0,
+             volatility=None, correlation=None, max_workers=None):
+    """
+    Breach probabilities per company (rows) and rule (columns, plus ANY_BREACH).
+
+    base: company × item matrix from scenarios.base_items
+    max_workers: process pool size (None for os.cpu_count(), 0 to run in-process)
+    Every company sees the same shock paths, so results do not depend on how
+    companies are split into blocks.
+    """
+    scale = shock_scale(volatility, correlation)
+    batches = [min(batch_size, n_paths - start) for start in range(0, n_paths, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    block = max(1, BATCH_ELEMENTS // batch_size)
+
+    tasks = [
+        (slice(start, start + block), batch_seed, batch_paths)
+        for start in range(0, len(companies), block)
+        for batch_seed, batch_paths in zip(seeds, batches)
+    ]
+
+    counts = np.zeros((len(companies), len(BREACH_RULES)), dtype=np.int64)
+    any_counts = np.zeros(len(companies), dtype=np.int64)
+
+    if max_workers == 0:
+        results = (_simulate_batch(base[rows], batch_seed, batch_paths, scale)
+                   for rows, batch_seed, batch_paths in tasks)
+        for (rows, _, _), (rule_counts, any_count) in zip(tasks, results):
+            counts[rows] += rule_counts
+            any_counts[rows] += any_count
+    else:
+        # Spawned (not forked) workers: the dashboard server runs many threads
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_simulate_batch, base[rows], batch_seed, batch_paths, scale)
+                       for rows, batch_seed, batch_paths in tasks]
+            for (rows, _, _), future in zip(tasks, futures):
+                rule_counts, any_count = future.result()
+                counts[rows] += rule_counts
+                any_counts[rows] += any_count
+
+    probabilities = pd.DataFrame(counts / n_paths, index=companies, columns=[rule[0] for rule in BREACH_RULES])
+    probabilities[ANY_BREACH] = any_counts / n_paths
+    probabilities.index.name = 'company'
+    return probabilities
+
+
+def standard_error(probabilities, n_paths):
+    """Monte Carlo standard error of each probability"""
+    return np.sqrt(probabilities * (1 - probabilities) / n_paths)
+
+
+def stress_key(base, companies, year, n_paths, seed, volatility=None, correlation=None):
+    """Hash of everything a result depends on (data, thresholds and simulation parameters)"""
+    scale = shock_scale(volatility, correlation)
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(base, dtype=np.float64).tobytes())
+    digest.update(scale.tobytes())
+    digest.update(json.dumps({
+        'companies': list(companies), 'items': ITEMS, 'year': year, 'paths': n_paths, 'seed': seed,
+        'rules': BREACH_RULES, 'formulas': FORMULA_VERSION,
+    }).encode())
+    return digest.hexdigest()[:24]
+
+
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir, f"stress_{key}.pkl")
+
+
+def load_cached(key, cache_dir=CACHE_DIR):
+    """Cached probabilities for a stress_key, or None"""
+    path = _cache_path(key, cache_dir)
+    return pd.read_pickle(path) if os.path.exists(path) else None
+
+
+def stress_test(inputs_cube, companies, year, n_paths=100_000, seed=0, ratio_cube=None,
+                cache_dir=CACHE_DIR, max_workers=None):
+    """Cached breach probabilities for the given companies; simulates and stores them on a miss"""
+    base = base_items(inputs_cube, companies, year, ratio_cube)
+    key = stress_key(base, companies, year, n_paths, seed)
+
+    probabilities = load_cached(key, cache_dir)
+    if probabilities is None:
+        probabilities = simulate(base, companies, n_paths=n_paths, seed=seed, max_workers=max_workers)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a partial file
+        tmp_path = _cache_path(key, cache_dir) + f".{os.getpid()}.tmp"
+        probabilities.to_pickle(tmp_path)
+        os.replace(tmp_path, _cache_path(key, cache_dir))
+    return probabilities
+
+
+def main(argv=None):
+    from cube import MasterCube
+    from pipeline.master import load_master_frames, compact_master_frames
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=os.environ.get("RATIOS_DATA_DIR", "./pipeline"),
+                        help="folder with master_ratios.xlsx and master_inputs.xlsx")
+    parser.add_argument("--year", default="2024")
+    parser.add_argument("--paths", type=int, default=100_000, help="simulated paths per company")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (0 runs in-process)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    master_df, master_inputs_df = compact_master_frames(*load_master_frames(args.data_dir))
+    inputs_cube = MasterCube.from_frame(master_inputs_df, 'item')
+    ratio_cube = MasterCube.from_frame(master_df, 'ratio_name')
+
+    start = time.perf_counter()
+    probabilities = stress_test(inputs_cube, inputs_cube.companies, args.year, args.paths, args.seed,
+                                ratio_cube, args.cache_dir, args.workers)
+    print(probabilities.to_string(float_format="{:.2%}".format))
+    print(f"\n{len(probabilities)} companies × {args.paths:,} paths in {time.perf_counter() - start:.1f}s "
+          f"(cache: {args.cache_dir})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
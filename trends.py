@@ -0,0 +1,152 @@
+"""Period-over-period trend statistics for every company × ratio at once.
+
+All statistics are computed with one vectorized pass over the time axis of a
+company × ratio × period cube (see cube.MasterCube). Periods are whatever year
+(or quarter) columns the master table carries, so the same code gives YoY
+changes for annual data and QoQ changes for quarterly data.
+"""
+import numpy as np
+import pandas as pd
+
+# Ratios where a fall is an improvement; ratios in NEUTRAL_RATIOS are never flagged
+LOWER_IS_BETTER = {
+    'Debt to Equity Ratio',
+    'Non-current Liabilities Ratio',
+    'Current Liabilities Ratio',
+    'Days to Sell Inventory',
+    'Days Sales Outstanding',
+    'Cash Conversion Cycle',
+}
+NEUTRAL_RATIOS = {
+    'Non-current Assets Ratio',
+    'Current Assets Ratio',
+    'Days Payable Outstanding',
+}
+
+# Relative change beyond which a move in the wrong direction counts as significant
+DETERIORATION_THRESHOLD = 0.10
+
+
+def ratio_direction(ratio_name):
+    """+1 if higher is better, -1 if lower is better, 0 if neither"""
+    if ratio_name in NEUTRAL_RATIOS:
+        return 0
+    return -1 if ratio_name in LOWER_IS_BETTER else 1
+
+
+class TrendSet:
+    """Trend statistics aligned with the companies/ratios of the cube they came from"""
+
+    def __init__(self, cube, threshold=DETERIORATION_THRESHOLD):
+        self.companies = cube.companies
+        self.ratios = cube.items
+        self.periods = cube.years
+        self.company_index = cube.company_index
+        self.ratio_index = cube.item_index
+
+        values = cube.values.astype(np.float64)
+        self.values = values
+
+        # Period-over-period changes: (company, ratio, period - 1)
+        self.delta = np.diff(values, axis=2)
+        previous = values[:, :, :-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.pct_change = np.where(previous != 0, self.delta / np.abs(previous), np.nan)
+
+        # Latest change (NaN when either of the last two periods is missing)
+        n_periods = values.shape[2]
+        if n_periods > 1:
+            self.last_delta = self.delta[:, :, -1]
+            self.last_pct_change = self.pct_change[:, :, -1]
+        else:
+            self.last_delta = np.full(values.shape[:2], np.nan)
+            self.last_pct_change = np.full(values.shape[:2], np.nan)
+
+        self.cagr = _cagr(values)
+        self.slope = _slope(values, np.arange(n_periods, dtype=np.float64))
+
+        # Direction-adjusted change: positive is an improvement
+        self.direction = np.array([ratio_direction(ratio) for ratio in self.ratios], dtype=np.float64)
+        self.improvement = self.last_pct_change * self.direction
+        self.deteriorating = self.improvement < -threshold
+
+    def last_change(self, company, ratio):
+        """Latest absolute change, or None if it cannot be computed"""
+        try:
+            value = self.last_delta[self.company_index[company], self.ratio_index[ratio]]
+        except KeyError:
+            return None
+        return None if np.isnan(value) else float(value)
+
+    def series(self, companies, ratio):
+        """Long table (Company | Period | Value) of one ratio for plotting"""
+        ratio_idx = self.ratio_index[ratio]
+        company_idx = [self.company_index[company] for company in companies if company in self.company_index]
+        block = self.values[company_idx, ratio_idx, :]
+
+        return pd.DataFrame({
+            'Company': np.repeat([self.companies[i] for i in company_idx], len(self.periods)),
+            'Period': np.tile(self.periods, len(company_idx)),
+            'Value': block.ravel(),
+        }).dropna(subset=['Value'])
+
+    def table(self, companies, ratios=None):
+        """Latest value and trend statistics per company × ratio"""
+        ratios = self.ratios if ratios is None else [r for r in ratios if r in self.ratio_index]
+        company_idx = np.array([self.company_index[c] for c in companies if c in self.company_index], dtype=int)
+        ratio_idx = np.array([self.ratio_index[r] for r in ratios], dtype=int)
+
+        grid = np.ix_(company_idx, ratio_idx)
+        table = pd.DataFrame({
+            'Company': np.repeat([self.companies[i] for i in company_idx], len(ratio_idx)),
+            'Ratio': np.tile([self.ratios[i] for i in ratio_idx], len(company_idx)),
+            'Latest': self.values[:, :, -1][grid].ravel(),
+            'Change': self.last_delta[grid].ravel(),
+            'Change %': self.last_pct_change[grid].ravel(),
+            'CAGR': self.cagr[grid].ravel(),
+            'Slope': self.slope[grid].ravel(),
+            'Deteriorating': self.deteriorating[grid].ravel(),
+        })
+        table.insert(2, 'Trend', np.where(table['Change'] > 0, "▲", np.where(table['Change'] < 0, "▼",
+                                          np.where(table['Change'] == 0, "▬", ""))))
+        return table
+
+    def deteriorations(self, companies):
+        """Rows of table() flagged as a significant move in the wrong direction"""
+        table = self.table(companies)
+        return table[table['Deteriorating']].sort_values('Change %', key=np.abs, ascending=False)
+
+
+def _cagr(values):
+    """Compound growth between the first and last observed period of each series"""
+    valid = ~np.isnan(values)
+    n_periods = values.shape[2]
+    has_data = valid.any(axis=2)
+
+    first_idx = valid.argmax(axis=2)
+    last_idx = n_periods - 1 - valid[:, :, ::-1].argmax(axis=2)
+    first = np.take_along_axis(values, first_idx[:, :, None], axis=2)[:, :, 0]
+    last = np.take_along_axis(values, last_idx[:, :, None], axis=2)[:, :, 0]
+    span = (last_idx - first_idx).astype(np.float64)
+
+    # Growth rates are only defined for positive levels over at least one period
+    ok = has_data & (span > 0) & (first > 0) & (last > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = np.power(last / first, 1.0 / span) - 1.0
+    return np.where(ok, cagr, np.nan)
+
+
+def _slope(values, x):
+    """Least-squares slope per period, ignoring missing periods"""
+    weights = (~np.isnan(values)).astype(np.float64)
+    y = np.nan_to_num(values)
+    count = weights.sum(axis=2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = (weights * x).sum(axis=2) / count
+        y_mean = (weights * y).sum(axis=2) / count
+        dx = (x - x_mean[:, :, None]) * weights
+        numerator = (dx * (y - y_mean[:, :, None])).sum(axis=2)
+        denominator = (dx * dx).sum(axis=2)
+        slope = numerator / denominator
+    return np.where((count >= 2) & (denominator > 0), slope, np.nan)
@@ -0,0 +1,94 @@
+"""Background processing of uploaded statement workbooks.
+
+Parsing a workbook is CPU-bound (openpyxl holds the GIL), so it runs in a
+process pool shared by every dashboard session. Finished companies are kept in
+the manager and merged into the dataset when the dashboard next collects them.
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline.ingest import process_workbook
+
+
+class UploadManager:
+    """Process-wide queue of upload jobs and the companies they produced"""
+
+    def __init__(self, max_workers=2, timings=None):
+        # Spawned (not forked) workers: the server process runs many threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._timings = timings
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._companies = {}
+        self.version = 0
+
+    def submit(self, filename, data):
+        """Queue an uploaded workbook for parsing; returns the job id"""
+        job_id = uuid.uuid4().hex
+        future = self._executor.submit(process_workbook, bytes(data), filename)
+        with self._lock:
+            self._jobs[job_id] = {
+                'filename': filename,
+                'submitted': time.time(),
+                'future': future,
+                'status': 'queued',
+                'error': None,
+            }
+        return job_id
+
+    def collect(self):
+        """
+        Move finished jobs into the company store.
+        Returns True if the dataset changed since the last call.
+        """
+        changed = False
+        with self._lock:
+            for job in self._jobs.values():
+                future = job['future']
+                if job['status'] in ('done', 'failed'):
+                    continue
+                if not future.done():
+                    job['status'] = 'parsing' if future.running() else 'queued'
+                    continue
+
+                try:
+                    company_name, inputs_df, ratios_df, stage_timings = future.result()
+                except Exception as e:
+                    job['status'] = 'failed'
+                    job['error'] = str(e)
+                    continue
+
+                if self._timings is not None:
+                    self._timings.record_many(stage_timings, prefix="pipeline.")
+                self._companies[company_name] = (inputs_df, ratios_df)
+                job['status'] = 'done'
+                job['company'] = company_name
+                changed = True
+
+            if changed:
+                self.version += 1
+        return changed
+
+    def jobs(self, job_ids):
+        """Snapshot of the given jobs for display (newest first)"""
+        with self._lock:
+            jobs = [
+                {k: v for k, v in self._jobs[job_id].items() if k != 'future'}
+                for job_id in job_ids if job_id in self._jobs
+            ]
+        return sorted(jobs, key=lambda job: job['submitted'], reverse=True)
+
+    def pending(self, job_ids):
+        """Number of the given jobs that have not finished yet"""
+        return sum(job['status'] in ('queued', 'parsing') for job in self.jobs(job_ids))
+
+    def companies(self):
+        """Uploaded companies as {company: (inputs_df, ratios_df)}"""
+        with self._lock:
+            return dict(self._companies)